@@ -1,69 +1,113 @@
 from typing import List, Tuple
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 from models.schema import Transaction, BehaviorPattern, Trigger, AnalysisResult
 
 DISCRETIONARY_CATEGORIES = {"shopping", "entertainment", "dining", "food", "travel"}
+BINGE_WINDOW = timedelta(hours=6)
 
+# Packed per-transaction tag bits; membership checks become a single AND.
+TAG_LATE_NIGHT = 1 << 0
+TAG_MORNING = 1 << 1
+TAG_AFTERNOON = 1 << 2
+TAG_EVENING = 1 << 3
+TAG_WEEKEND = 1 << 4
+TAG_DISCRETIONARY = 1 << 5
 
-def _is_weekend(dt: datetime) -> bool:
-    return dt.weekday() >= 5  # 5=Sat, 6=Sun
+_TAG_NAMES = (
+    (TAG_LATE_NIGHT, "late-night"),
+    (TAG_MORNING, "morning"),
+    (TAG_AFTERNOON, "afternoon"),
+    (TAG_EVENING, "evening"),
+    (TAG_WEEKEND, "weekend"),
+    (TAG_DISCRETIONARY, "discretionary"),
+)
+# bits -> tag names, so untagged rows get their tag list without a merge loop
+_TAG_LISTS = tuple(tuple(name for bit, name in _TAG_NAMES if bits & bit) for bits in range(1 << len(_TAG_NAMES)))
 
+# hour -> time bucket bit, replacing a per-call comparison cascade
+_HOUR_BITS = (TAG_LATE_NIGHT,) * 5 + (TAG_MORNING,) * 7 + (TAG_AFTERNOON,) * 5 + (TAG_EVENING,) * 7
 
-def _time_bucket(dt: datetime) -> str:
-    h = dt.hour
-    if 0 <= h < 5:
-        return "late-night"
-    if 5 <= h < 12:
-        return "morning"
-    if 12 <= h < 17:
-        return "afternoon"
-    return "evening"
+# day-of-month -> within two days of the 1st or 15th (days 1-3 and 13-17)
+_NEAR_PAYDAY = tuple(abs(d - (1 if d <= 8 else 15)) <= 2 for d in range(32))
+
+
+def _is_weekend(weekday: int) -> bool:
+    return weekday >= 5  # 5=Sat, 6=Sun
+
+
+def _with_tags(existing: List[str], bits: int) -> List[str]:
+    if not existing:
+        return list(_TAG_LISTS[bits])
+    tags = list(existing)
+    for name in _TAG_LISTS[bits]:
+        if name not in tags:
+            tags.append(name)
+    return tags
+
+
+def _detect_binges(dates: List[datetime], min_count: int = 3) -> List[Tuple[int, int]]:
+    """Return half-open ``(start, end)`` index ranges of binge clusters in sorted ``dates``."""
+    windows: List[Tuple[int, int]] = []
+    n = len(dates)
+    # Two-pointer sweep: j never moves backward, so the scan is amortized O(n).
+    i = 0
+    j = 0
+    while i < n:
+        while j < n and (dates[j] - dates[i]) <= BINGE_WINDOW:
+            j += 1
+        if j - i >= min_count:
+            windows.append((i, j))
+            # Skip past this cluster so one binge isn't reported once per member
+            i = j
+        else:
+            i += 1
+    return windows
 
 
 def analyze_transactions(transactions: List[Transaction]) -> AnalysisResult:
-    # Derive simple tags
+    # Single fused pass: derive tags and accumulate every aggregate the
+    # detectors below need, so transactions are only walked once.
+    discretionary_dates: List[datetime] = []
+    weekend_spend = 0.0
+    weekday_spend = 0.0
+    near_payday_spend = 0.0
     for t in transactions:
-        tags = set(t.derived_tags or [])
-        bucket = _time_bucket(t.date)
-        tags.add(bucket)
-        if _is_weekend(t.date):
-            tags.add("weekend")
+        dt = t.date
+        bits = _HOUR_BITS[dt.hour]
+        weekend = _is_weekend(dt.weekday())
+        if weekend:
+            bits |= TAG_WEEKEND
         if t.base_category in DISCRETIONARY_CATEGORIES:
-            tags.add("discretionary")
-        t.derived_tags = list(tags)
+            bits |= TAG_DISCRETIONARY
+            discretionary_dates.append(dt)
+            if weekend:
+                weekend_spend += t.amount
+            else:
+                weekday_spend += t.amount
+            if _NEAR_PAYDAY[dt.day]:
+                near_payday_spend += t.amount
+        t.derived_tags = _with_tags(t.derived_tags, bits)
 
     patterns: List[BehaviorPattern] = []
     triggers: List[Trigger] = []
 
     # Binge cycles: ≥3 discretionary in ≤6 hours
-    discretionary = [t for t in transactions if "discretionary" in t.derived_tags]
-    discretionary.sort(key=lambda x: x.date)
-    n = len(discretionary)
-    i = 0
-    while i < n:
-        j = i
-        while j < n and (discretionary[j].date - discretionary[i].date) <= timedelta(hours=6):
-            j += 1
-        window = discretionary[i:j]
-        if len(window) >= 3:
-            confidence = min(1.0, 0.3 + 0.1 * len(window))
-            patterns.append(
-                BehaviorPattern(
-                    id=None,
-                    user_id=None,
-                    type="binge",
-                    confidence=confidence,
-                    period=(window[0].date, window[-1].date),
-                    supporting_evidence=[k for k in range(len(window))],
-                )
+    dates = sorted(discretionary_dates)
+    for start, end in _detect_binges(dates):
+        count = end - start
+        patterns.append(
+            BehaviorPattern(
+                id=None,
+                user_id=None,
+                type="binge",
+                confidence=min(1.0, 0.3 + 0.1 * count),
+                period=(dates[start], dates[end - 1]),
+                supporting_evidence=list(range(count)),
             )
-        i += 1
+        )
 
     # Weekend trigger: elevated discretionary on weekends
-    weekend_spend = sum(t.amount for t in transactions if "weekend" in t.derived_tags and "discretionary" in t.derived_tags)
-    weekday_spend = sum(t.amount for t in transactions if "weekend" not in t.derived_tags and "discretionary" in t.derived_tags)
     weekend_ratio = (weekend_spend + 1) / (weekday_spend + 1)
     if weekend_ratio > 1.3 and weekend_spend > 0:
         triggers.append(
@@ -77,12 +121,6 @@ def analyze_transactions(transactions: List[Transaction]) -> AnalysisResult:
         )
 
     # Payday trigger (heuristic): if high discretionary spend near the 1st or 15th
-    def _is_payday(dt: datetime) -> bool:
-        return dt.day in (1, 15)
-
-    near_payday_spend = sum(
-        t.amount for t in discretionary if abs(t.date.day - (1 if t.date.day <= 8 else 15)) <= 2
-    )
     if near_payday_spend > 0 and near_payday_spend > (weekday_spend + weekend_spend) * 0.2:
         triggers.append(
             Trigger(
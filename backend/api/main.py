@@ -1,11 +1,21 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Request
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
+from fastapi.responses import ORJSONResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from typing import Any, Dict, Iterator, List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import hashlib
+import hmac
+import time
 import io
 import csv
 from datetime import datetime
 
-from backend.ingestion.parser import parse_csv_bytes
+from backend.ingestion.parser import parse_csv_stream
 from backend.analysis.detection import analyze_transactions
 from backend.insights.engine import synthesize_insights
 from backend.challenges.engine import propose_challenges
@@ -17,7 +27,7 @@ from models.schema import ExportRequest, ExportResponse, AnalyzeExportRequest, A
 from configs.settings import CORS_ORIGINS, GOOGLE_SHEETS_CREDENTIALS, FIREBASE_SERVICE_ACCOUNT, FIREBASE_PROJECT_ID, REQUIRE_AUTH, DEV_BYPASS_TOKEN
 import logging
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 logger = logging.getLogger("pfba")
 logging.basicConfig(level=logging.INFO)
 
@@ -32,6 +42,81 @@ app.add_middleware(
 firebase_client = FirebaseClient(project_id=FIREBASE_PROJECT_ID, service_account_path=FIREBASE_SERVICE_ACCOUNT)
 sheets_client = SheetsClient(credentials_json=GOOGLE_SHEETS_CREDENTIALS)
 
+# Blocking integration calls (Firebase, Sheets, upload parsing) run here so
+# they neither stall the event loop nor starve FastAPI's shared threadpool.
+BLOCKING_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="pfba-io")
+
+
+async def _offload(fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(BLOCKING_POOL, functools.partial(fn, *args, **kwargs))
+
+# Small in-process LRU of analysis results keyed by a digest of the payload,
+# so retries and /analyze -> /analyze_full round-trips skip recomputation.
+ANALYSIS_CACHE_SIZE = 128
+_analysis_cache: "OrderedDict[bytes, AnalysisResult]" = OrderedDict()
+
+
+def _transactions_key(transactions: List[Transaction]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for t in transactions:
+        h.update(f"{t.date.isoformat()}|{t.amount!r}|{t.base_category}\n".encode())
+    return h.digest()
+
+
+def _analyze_cached(transactions: List[Transaction]) -> AnalysisResult:
+    key = _transactions_key(transactions)
+    result = _analysis_cache.get(key)
+    if result is not None:
+        _analysis_cache.move_to_end(key)
+        return result
+    result = analyze_transactions(transactions)
+    _analysis_cache[key] = result
+    if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+        _analysis_cache.popitem(last=False)
+    return result
+
+# Validators built once at import; request bodies are parsed straight from
+# JSON bytes instead of going through FastAPI's per-parameter validation.
+TRANSACTIONS_ADAPTER = TypeAdapter(List[Transaction])
+ANALYZE_EXPORT_ADAPTER = TypeAdapter(AnalyzeExportRequest)
+
+
+async def _parse_body(request: Request, adapter: TypeAdapter) -> Any:
+    try:
+        return adapter.validate_json(await request.body())
+    except ValidationError as e:
+        # Match FastAPI's own body errors, which are located under "body".
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors()])
+
+
+# Nested models of manually parsed bodies, registered as OpenAPI components.
+_BODY_SCHEMA_DEFS: Dict[str, Any] = {}
+
+
+def _body_openapi(adapter: TypeAdapter) -> Dict[str, Any]:
+    """Document a manually parsed JSON body in the OpenAPI schema."""
+    schema = adapter.json_schema(ref_template="#/components/schemas/{model}")
+    _BODY_SCHEMA_DEFS.update(schema.pop("$defs", {}))
+    return {
+        "requestBody": {
+            "content": {"application/json": {"schema": schema}},
+            "required": True,
+        }
+    }
+
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+
+def _iter_upload_lines(upload: UploadFile, limit: int = MAX_UPLOAD_BYTES) -> Iterator[str]:
+    """Decode an upload line by line, rejecting it once it exceeds ``limit`` bytes."""
+    read = 0
+    for raw in upload.file:
+        read += len(raw)
+        if read > limit:
+            raise HTTPException(status_code=413, detail="File too large (max 10MB)")
+        yield raw.decode("utf-8", errors="ignore")
+
 def _get_bearer_token(request: Request) -> str | None:
     auth = request.headers.get("Authorization")
     if not auth:
@@ -40,48 +125,74 @@ def _get_bearer_token(request: Request) -> str | None:
         return auth.split(" ", 1)[1]
     return None
 
+# Verified tokens are remembered briefly so a client's burst of requests
+# doesn't pay a Firebase verification round-trip each time.
+AUTH_CACHE_TTL_SECONDS = 300
+AUTH_CACHE_SIZE = 4096
+_verified_tokens: Dict[bytes, float] = {}
+
+
+async def _token_verified(token: str) -> bool:
+    if not token:
+        return False
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    now = time.monotonic()
+    expires_at = _verified_tokens.get(key)
+    if expires_at is not None and expires_at > now:
+        return True
+    if not await _offload(firebase_client.verify_token, token):
+        return False
+    if len(_verified_tokens) >= AUTH_CACHE_SIZE:
+        for k in [k for k, exp in _verified_tokens.items() if exp <= now]:
+            del _verified_tokens[k]
+        if len(_verified_tokens) >= AUTH_CACHE_SIZE:
+            _verified_tokens.clear()
+    _verified_tokens[key] = now + AUTH_CACHE_TTL_SECONDS
+    return True
+
+
+async def _authorize(request: Request, allow_dev_bypass: bool) -> None:
+    if not REQUIRE_AUTH:
+        return
+    token = _get_bearer_token(request)
+    if allow_dev_bypass and DEV_BYPASS_TOKEN and token and hmac.compare_digest(token.encode(), DEV_BYPASS_TOKEN.encode()):
+        return
+    if not await _token_verified(token or ""):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+async def require_auth(request: Request) -> None:
+    await _authorize(request, allow_dev_bypass=True)
+
+
+async def require_auth_no_bypass(request: Request) -> None:
+    await _authorize(request, allow_dev_bypass=False)
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
-@app.post("/ingest", response_model=List[Transaction])
-async def ingest(request: Request, file: UploadFile = File(...)):
-    if REQUIRE_AUTH:
-        token = _get_bearer_token(request)
-        if DEV_BYPASS_TOKEN and token == DEV_BYPASS_TOKEN:
-            pass
-        elif not firebase_client.verify_token(token or ""):
-            raise HTTPException(status_code=401, detail="Unauthorized")
-    content = await file.read()
-    if content and len(content) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=413, detail="File too large (max 10MB)")
-    transactions = parse_csv_bytes(content)
+@app.post("/ingest", response_model=List[Transaction], dependencies=[Depends(require_auth)])
+async def ingest(file: UploadFile = File(...)):
+    transactions = await _offload(parse_csv_stream, _iter_upload_lines(file))
     return transactions
 
-@app.post("/analyze", response_model=AnalysisResult)
-async def analyze(request: Request, transactions: List[Transaction]):
-    if REQUIRE_AUTH:
-        token = _get_bearer_token(request)
-        if DEV_BYPASS_TOKEN and token == DEV_BYPASS_TOKEN:
-            pass
-        elif not firebase_client.verify_token(token or ""):
-            raise HTTPException(status_code=401, detail="Unauthorized")
-    result = analyze_transactions(transactions)
+@app.post("/analyze", response_model=AnalysisResult, dependencies=[Depends(require_auth)],
+          openapi_extra=_body_openapi(TRANSACTIONS_ADAPTER))
+async def analyze(request: Request):
+    transactions = await _parse_body(request, TRANSACTIONS_ADAPTER)
+    result = _analyze_cached(transactions)
     if not transactions:
         raise HTTPException(status_code=422, detail="No transactions provided")
     return result
 
-@app.post("/analyze_full", response_model=FullAnalysisResponse)
-async def analyze_full(request: Request, transactions: List[Transaction]):
-    if REQUIRE_AUTH:
-        token = _get_bearer_token(request)
-        if DEV_BYPASS_TOKEN and token == DEV_BYPASS_TOKEN:
-            pass
-        elif not firebase_client.verify_token(token or ""):
-            raise HTTPException(status_code=401, detail="Unauthorized")
+@app.post("/analyze_full", response_model=FullAnalysisResponse, dependencies=[Depends(require_auth)],
+          openapi_extra=_body_openapi(TRANSACTIONS_ADAPTER))
+async def analyze_full(request: Request):
+    transactions = await _parse_body(request, TRANSACTIONS_ADAPTER)
     if not transactions:
         raise HTTPException(status_code=422, detail="No transactions provided")
-    base = analyze_transactions(transactions)
+    base = _analyze_cached(transactions)
     insights = synthesize_insights(base.patterns, base.triggers)
     challenges = propose_challenges(insights)
     return FullAnalysisResponse(
@@ -91,24 +202,16 @@ async def analyze_full(request: Request, transactions: List[Transaction]):
         challenges=challenges,
     )
 
-@app.post("/export/sheets", response_model=ExportResponse)
-async def export_sheets(request: Request, req: ExportRequest):
-    if REQUIRE_AUTH:
-        token = _get_bearer_token(request)
-        if not firebase_client.verify_token(token or ""):
-            raise HTTPException(status_code=401, detail="Unauthorized")
-    url = sheets_client.export_summary(user_id=req.user_id, summary=req.summary)
+@app.post("/export/sheets", response_model=ExportResponse, dependencies=[Depends(require_auth_no_bypass)])
+async def export_sheets(req: ExportRequest):
+    url = await _offload(sheets_client.export_summary, user_id=req.user_id, summary=req.summary)
     return ExportResponse(url=url)
 
-@app.post("/analyze_export", response_model=AnalyzeExportResponse)
-async def analyze_export(request: Request, req: AnalyzeExportRequest):
-    if REQUIRE_AUTH:
-        token = _get_bearer_token(request)
-        if DEV_BYPASS_TOKEN and token == DEV_BYPASS_TOKEN:
-            pass
-        elif not firebase_client.verify_token(token or ""):
-            raise HTTPException(status_code=401, detail="Unauthorized")
-    base = analyze_transactions(req.transactions)
+@app.post("/analyze_export", response_model=AnalyzeExportResponse, dependencies=[Depends(require_auth)],
+          openapi_extra=_body_openapi(ANALYZE_EXPORT_ADAPTER))
+async def analyze_export(request: Request):
+    req = await _parse_body(request, ANALYZE_EXPORT_ADAPTER)
+    base = _analyze_cached(req.transactions)
     if not req.transactions:
         raise HTTPException(status_code=422, detail="No transactions provided")
     insights = synthesize_insights(base.patterns, base.triggers)
@@ -120,9 +223,24 @@ async def analyze_export(request: Request, req: AnalyzeExportRequest):
         challenges=challenges,
     )
     summary = make_summary(req.transactions, base.patterns, base.triggers, insights)
-    url = sheets_client.export_summary(user_id=req.user_id, summary=summary)
+    url = await _offload(sheets_client.export_summary, user_id=req.user_id, summary=summary)
     try:
         firebase_client.save_analysis(user_id=req.user_id, data={"summary": summary, "analysis": full.model_dump()})
     except Exception as e:
         logger.warning(f"Failed to persist analysis: {e}")
     return AnalyzeExportResponse(url=url, summary=summary, analysis=full)
+
+
+_default_openapi = app.openapi
+
+
+def _openapi() -> Dict[str, Any]:
+    if app.openapi_schema is None:
+        schema = _default_openapi()
+        components = schema.setdefault("components", {}).setdefault("schemas", {})
+        for name, definition in _BODY_SCHEMA_DEFS.items():
+            components.setdefault(name, definition)
+    return app.openapi_schema
+
+
+app.openapi = _openapi
@@ -4,6 +4,7 @@ Simplified FastAPI Backend - No complex middleware, just core functionality
 
 from fastapi import FastAPI, Depends, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from typing import Optional
@@ -13,8 +14,12 @@ import json
 
 from database import SessionLocal, init_db, engine
 from models import User, UserTransaction, UserFinancialMetrics
-from auth.security import hash_password, verify_password, create_access_token, create_refresh_token, verify_refresh_token
+from auth.security import (
+    hash_password, verify_password, create_access_token, create_refresh_token,
+    verify_refresh_token, DUMMY_PASSWORD_HASH
+)
 from auth.schemas import UserRegister, UserLogin, Token, TokenRefresh, UserResponse
+from auth.routes import get_user_by_email
 from routes.pdf_export import router as pdf_router
 
 load_dotenv()
@@ -23,7 +28,8 @@ load_dotenv()
 app = FastAPI(
     title="Personal Behavioral Analyst API",
     description="Simple backend for financial analytics",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware (simple version)
@@ -53,10 +59,6 @@ def get_db():
     finally:
         db.close()
 
-# Helper functions
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
-
 # ============================================
 # Health Check
 # ============================================
@@ -109,7 +111,10 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
 def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """Login user"""
     user = get_user_by_email(db, credentials.email)
-    if not user or not verify_password(credentials.password, user.password_hash):
+    if not user:
+        verify_password(credentials.password, DUMMY_PASSWORD_HASH)  # same cost as a real check
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not verify_password(credentials.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     if not user.is_active:
@@ -9,10 +9,17 @@ Authentication Routes
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, bindparam
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Optional, Deque, Dict
+from collections import deque
+import hmac
 import json
+import os
+import random
+import threading
 
 from database import get_db
 from models import User, PasswordResetToken, GuestDataMigration, UserTransaction, UserFinancialMetrics
@@ -23,6 +30,7 @@ from auth.schemas import (
 )
 from auth.security import (
     hash_password, verify_password,
+    hash_password_async, verify_password_async, DUMMY_PASSWORD_HASH,
     create_access_token, create_refresh_token,
     verify_refresh_token, create_password_reset_token,
     verify_password_reset_token, verify_access_token
@@ -30,8 +38,28 @@ from auth.security import (
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
-# Rate limiting storage (in production, use Redis)
-login_attempts = {}
+# Rate limiting storage: Redis when REDIS_URL is configured (shared across
+# workers), otherwise the in-process fallback below.
+try:
+    import redis  # type: ignore
+    _redis = redis.Redis.from_url(os.environ["REDIS_URL"]) if os.getenv("REDIS_URL") else None
+except Exception:
+    _redis = None
+
+# Per-IP deque of attempt timestamps, oldest first. Rejected attempts are not
+# recorded, so each deque never grows past the largest max_attempts in use.
+login_attempts: Dict[str, Deque[datetime]] = {}
+_rate_limit_calls = 0
+RATE_LIMIT_SWEEP_EVERY = 1024
+RATE_LIMIT_SWEEP_WINDOW = timedelta(minutes=15)
+# check_rate_limit runs on threadpool threads; guards login_attempts and its deques
+_rate_limit_lock = threading.Lock()
+
+# Fraction of reset requests that also purge expired reset tokens
+RESET_TOKEN_PURGE_PROBABILITY = 0.01
+
+# Built once so SQLAlchemy's compiled-statement cache is hit on every lookup
+_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
 
 
 # ============================================
@@ -44,37 +72,91 @@ def check_rate_limit(request: Request, max_attempts: int = 5, window_minutes: in
     Returns True if allowed, False if rate limited.
     """
     client_ip = request.client.host
-    current_time = datetime.utcnow()
     
-    if client_ip not in login_attempts:
-        login_attempts[client_ip] = []
+    if _redis is not None:
+        try:
+            return _check_rate_limit_redis(client_ip, max_attempts, window_minutes)
+        except Exception as e:
+            print(f"Redis rate limit unavailable, using in-memory fallback: {e}")
     
-    # Remove old attempts outside the window
-    login_attempts[client_ip] = [
-        attempt for attempt in login_attempts[client_ip]
-        if current_time - attempt < timedelta(minutes=window_minutes)
+    return _check_rate_limit_memory(client_ip, max_attempts, window_minutes)
+
+
+def _check_rate_limit_redis(client_ip: str, max_attempts: int, window_minutes: int) -> bool:
+    """Fixed-window counter in Redis: one pipelined round-trip per check."""
+    key = f"ratelimit:auth:{client_ip}"
+    pipe = _redis.pipeline()
+    pipe.set(key, 0, ex=window_minutes * 60, nx=True)
+    pipe.incr(key)
+    _, count = pipe.execute()
+    return count <= max_attempts
+
+
+def _check_rate_limit_memory(client_ip: str, max_attempts: int, window_minutes: int) -> bool:
+    """In-process sliding window, used when Redis is not configured."""
+    global _rate_limit_calls
+    current_time = datetime.utcnow()
+    window = timedelta(minutes=window_minutes)
+    
+    with _rate_limit_lock:
+        _rate_limit_calls += 1
+        if _rate_limit_calls % RATE_LIMIT_SWEEP_EVERY == 0:
+            _sweep_rate_limits(current_time)
+        
+        attempts = login_attempts.get(client_ip)
+        if attempts is None:
+            attempts = login_attempts[client_ip] = deque()
+        
+        # Drop attempts that fell out of the window (oldest are at the left)
+        while attempts and current_time - attempts[0] >= window:
+            attempts.popleft()
+        
+        # Check if limit exceeded
+        if len(attempts) >= max_attempts:
+            return False
+        
+        # Add current attempt
+        attempts.append(current_time)
+        return True
+
+
+def _sweep_rate_limits(current_time: datetime) -> None:
+    """Forget IPs with no attempts inside the sweep window to cap memory (caller holds _rate_limit_lock)."""
+    stale = [
+        ip for ip, attempts in login_attempts.items()
+        if not attempts or current_time - attempts[-1] >= RATE_LIMIT_SWEEP_WINDOW
     ]
-    
-    # Check if limit exceeded
-    if len(login_attempts[client_ip]) >= max_attempts:
-        return False
-    
-    # Add current attempt
-    login_attempts[client_ip].append(current_time)
-    return True
+    for ip in stale:
+        del login_attempts[ip]
+
+
+def _purge_expired_reset_tokens(db: Session) -> None:
+    """Delete expired password reset tokens so the table stays small."""
+    db.query(PasswordResetToken).filter(
+        PasswordResetToken.expires_at < datetime.utcnow()
+    ).delete(synchronize_session=False)
+
+
+def _parse_guest_date(value) -> Optional[date]:
+    """Parse a guest transaction date ('YYYY-MM-DD' or a full ISO timestamp)."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except ValueError:
+        return None
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    """Get user by email"""
-    return db.query(User).filter(User.email == email).first()
+    """Get user by email (unique-indexed point lookup)"""
+    return db.execute(_USER_BY_EMAIL, {"email": email}).scalar_one_or_none()
 
 
-def create_user(db: Session, email: str, password: str, username: Optional[str] = None) -> User:
-    """Create new user"""
-    hashed_pw = hash_password(password)
+def create_user(db: Session, email: str, password_hash: str, username: Optional[str] = None) -> User:
+    """Create new user from an already-hashed password"""
     user = User(
         email=email,
-        password_hash=hashed_pw,
+        password_hash=password_hash,
         username=username
     )
     db.add(user)
@@ -87,25 +169,10 @@ def create_user(db: Session, email: str, password: str, username: Optional[str]
 # Authentication Endpoints
 # ============================================
 
-@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
-    """
-    Register a new user account.
-    
-    - **email**: Valid email address
-    - **password**: Strong password (8+ chars, uppercase, number, special char)
-    - **username**: Optional display name
-    """
-    # Check if user already exists
-    existing_user = get_user_by_email(db, user_data.email)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
+def _register_account(db: Session, user_data: UserRegister, password_hash: str) -> Token:
+    """Blocking half of register: create the user and metrics, issue tokens."""
     # Create user
-    user = create_user(db, user_data.email, user_data.password, user_data.username)
+    user = create_user(db, user_data.email, password_hash, user_data.username)
     
     # Create empty financial metrics
     metrics = UserFinancialMetrics(user_id=user.id)
@@ -123,6 +190,28 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     )
 
 
+@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
+async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+    """
+    Register a new user account.
+    
+    - **email**: Valid email address
+    - **password**: Strong password (8+ chars, uppercase, number, special char)
+    - **username**: Optional display name
+    """
+    # Check if user already exists
+    existing_user = await run_in_threadpool(get_user_by_email, db, user_data.email)
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
+    # Hash on the bcrypt pool, then do the DB writes on the threadpool
+    password_hash = await hash_password_async(user_data.password)
+    return await run_in_threadpool(_register_account, db, user_data, password_hash)
+
+
 @router.post("/register-with-data", response_model=Token, status_code=status.HTTP_201_CREATED)
 def register_with_guest_data(user_data: UserRegisterWithData, db: Session = Depends(get_db)):
     """
@@ -140,22 +229,27 @@ def register_with_guest_data(user_data: UserRegisterWithData, db: Session = Depe
         )
     
     # Create user
-    user = create_user(db, user_data.email, user_data.password, user_data.username)
+    user = create_user(db, user_data.email, hash_password(user_data.password), user_data.username)
     
     # Migrate guest transactions
     guest_transactions = user_data.guest_data.get("transactions", [])
-    migrated_count = 0
-    
+    rows = []
     for trans in guest_transactions:
-        transaction = UserTransaction(
-            user_id=user.id,
-            date=trans.get("date", ""),
-            amount=trans.get("amount", 0),
-            category=trans.get("category", ""),
-            description=trans.get("description")
-        )
-        db.add(transaction)
-        migrated_count += 1
+        trans_date = _parse_guest_date(trans.get("date"))
+        if trans_date is None:
+            # Skip entries without a usable date
+            continue
+        rows.append({
+            "user_id": user.id,
+            "date": trans_date,
+            "amount": trans.get("amount", 0),
+            "category": trans.get("category", ""),
+            "description": trans.get("description"),
+        })
+    # Single multi-row INSERT instead of one ORM object per transaction
+    if rows:
+        db.bulk_insert_mappings(UserTransaction, rows)
+    migrated_count = len(rows)
     
     # Track migration
     migration = GuestDataMigration(
@@ -183,30 +277,31 @@ def register_with_guest_data(user_data: UserRegisterWithData, db: Session = Depe
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
+async def login(credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
     """
     Login with email and password.
     
     - Returns access token (15 min) and refresh token (7 days)
     - Rate limited to 5 attempts per 15 minutes per IP
     """
-    # Check rate limit
-    if not check_rate_limit(request, max_attempts=5, window_minutes=15):
+    # Check rate limit (may hit Redis, so off the event loop)
+    if not await run_in_threadpool(check_rate_limit, request, max_attempts=5, window_minutes=15):
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Too many login attempts. Please try again in 15 minutes."
         )
     
     # Find user
-    user = get_user_by_email(db, credentials.email)
+    user = await run_in_threadpool(get_user_by_email, db, credentials.email)
     if not user:
+        await verify_password_async(credentials.password, DUMMY_PASSWORD_HASH)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
-    # Verify password
-    if not verify_password(credentials.password, user.password_hash):
+    # Verify password (on the bcrypt pool)
+    if not await verify_password_async(credentials.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -316,6 +411,8 @@ def forgot_password(data: ForgotPassword, request: Request, db: Session = Depend
         expires_at=expires_at
     )
     db.add(db_token)
+    if random.random() < RESET_TOKEN_PURGE_PROBABILITY:
+        _purge_expired_reset_tokens(db)
     db.commit()
     
     # TODO: Send email with reset link
@@ -434,14 +531,10 @@ def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
             detail="Invalid or expired reset token"
         )
     
-    # Find token in database
-    db_token = db.query(PasswordResetToken).filter(
-        PasswordResetToken.token == data.token,
-        PasswordResetToken.used == False,
-        PasswordResetToken.expires_at > datetime.utcnow()
-    ).first()
+    # Find token in database (point lookup on the unique token index)
+    db_token = db.query(PasswordResetToken).filter_by(token=data.token).first()
     
-    if not db_token:
+    if not db_token or db_token.used or db_token.expires_at <= datetime.utcnow():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired reset token"
@@ -455,6 +548,13 @@ def reset_password(data: ResetPassword, db: Session = Depends(get_db)):
             detail="User not found"
         )
     
+    # Token must have been issued for this user's email
+    if not hmac.compare_digest(email.encode("utf-8"), user.email.encode("utf-8")):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired reset token"
+        )
+    
     # Update password
     user.password_hash = hash_password(data.new_password)
     db_token.used = True
@@ -5,10 +5,29 @@ Pydantic Schemas for Request/Response Validation
 - Data validation
 """
 
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List
-from datetime import datetime
-import re
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from typing import Any, Dict, List, Optional
+from datetime import date as date_type, datetime
+import string
+
+# Character classes for the password rules; ASCII-only to match the
+# original [A-Z] / [0-9] rules (str.isupper would also accept e.g. "É")
+_PASSWORD_UPPER = frozenset(string.ascii_uppercase)
+_PASSWORD_DIGITS = frozenset(string.digits)
+_PASSWORD_SPECIALS = frozenset('!@#$%^&*(),.?":{}|<>')
+
+
+def _validate_password_strength(v: str) -> str:
+    """Shared password strength check used by the password validators"""
+    # frozenset.isdisjoint walks the password in C and stops at the first hit
+    if _PASSWORD_UPPER.isdisjoint(v):
+        raise ValueError('Password must contain at least one uppercase letter')
+    if _PASSWORD_DIGITS.isdisjoint(v):
+        raise ValueError('Password must contain at least one number')
+    if _PASSWORD_SPECIALS.isdisjoint(v):
+        raise ValueError('Password must contain at least one special character')
+    return v
+
 
 # ============================================
 # Authentication Schemas
@@ -20,16 +39,11 @@ class UserRegister(BaseModel):
     password: str = Field(..., min_length=8)
     username: Optional[str] = Field(None, min_length=3, max_length=100)
     
-    @validator('password')
-    def validate_password(cls, v):
+    @field_validator('password')
+    @classmethod
+    def validate_password(cls, v: str) -> str:
         """Validate password strength"""
-        if not re.search(r'[A-Z]', v):
-            raise ValueError('Password must contain at least one uppercase letter')
-        if not re.search(r'[0-9]', v):
-            raise ValueError('Password must contain at least one number')
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', v):
-            raise ValueError('Password must contain at least one special character')
-        return v
+        return _validate_password_strength(v)
 
 
 class UserRegisterWithData(UserRegister):
@@ -65,16 +79,11 @@ class ResetPassword(BaseModel):
     token: str
     new_password: str = Field(..., min_length=8)
     
-    @validator('new_password')
-    def validate_password(cls, v):
+    @field_validator('new_password')
+    @classmethod
+    def validate_password(cls, v: str) -> str:
         """Validate password strength"""
-        if not re.search(r'[A-Z]', v):
-            raise ValueError('Password must contain at least one uppercase letter')
-        if not re.search(r'[0-9]', v):
-            raise ValueError('Password must contain at least one number')
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', v):
-            raise ValueError('Password must contain at least one special character')
-        return v
+        return _validate_password_strength(v)
 
 
 class ChangePassword(BaseModel):
@@ -82,16 +91,11 @@ class ChangePassword(BaseModel):
     current_password: str
     new_password: str = Field(..., min_length=8)
     
-    @validator('new_password')
-    def validate_password(cls, v):
+    @field_validator('new_password')
+    @classmethod
+    def validate_password(cls, v: str) -> str:
         """Validate password strength"""
-        if not re.search(r'[A-Z]', v):
-            raise ValueError('Password must contain at least one uppercase letter')
-        if not re.search(r'[0-9]', v):
-            raise ValueError('Password must contain at least one number')
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', v):
-            raise ValueError('Password must contain at least one special character')
-        return v
+        return _validate_password_strength(v)
 
 
 class UpdateProfile(BaseModel):
@@ -113,8 +117,7 @@ class UserResponse(BaseModel):
     created_at: datetime
     is_active: bool
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -123,7 +126,7 @@ class UserResponse(BaseModel):
 
 class TransactionCreate(BaseModel):
     """Create transaction"""
-    date: str
+    date: date_type
     amount: float = Field(..., gt=0)
     category: str = Field(..., min_length=1, max_length=100)
     description: Optional[str] = None
@@ -133,14 +136,13 @@ class TransactionResponse(BaseModel):
     """Transaction response"""
     id: int
     user_id: int
-    date: str
+    date: date_type
     amount: float
     category: str
     description: Optional[str]
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -173,13 +175,12 @@ class FinancialMetricsResponse(BaseModel):
     other_expenses: float
     total_expenses: float
     disposable_income: float
-    savings_tips: Optional[str]
+    savings_tips: Optional[List[Dict[str, Any]]]
     highest_category: Optional[str]
     highest_amount: float
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
@@ -194,8 +195,7 @@ class AnalysisResponse(BaseModel):
     content: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============================================
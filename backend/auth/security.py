@@ -1,21 +1,34 @@
 """
 Security Utilities
-- Password hashing with bcrypt
+- Password hashing with bcrypt (native binding, no passlib dispatch)
 - JWT token generation and validation
 - Token refresh logic
 """
 
-from passlib.context import CryptContext
-from jose import JWTError, jwt
+import asyncio
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from jose import JWTError, jwk, jwt
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import os
+import time
+import hashlib
 from dotenv import load_dotenv
 
 load_dotenv()
 
 # Password hashing configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Work factor is tunable per deployment; existing hashes keep their own cost.
+# Aim for roughly 250ms per hash on production hardware (see the startup log).
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_PREFIX = b"2b"
+
+# bcrypt releases the GIL while hashing, so plain threads already use every
+# core. Async handlers hash on this pool, sized to the core count, so a burst
+# of logins can't tie up the shared request threadpool (and CPU beyond the
+# core count would only queue anyway).
+_BCRYPT_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="bcrypt")
 
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
@@ -24,6 +37,23 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+# Token lifetimes and the accepted-algorithms list are fixed per process
+_ACCESS_TOKEN_TTL = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_TOKEN_TTL = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+_RESET_TOKEN_TTL = timedelta(hours=1)
+_ALGORITHMS = [ALGORITHM]
+
+# Signing keys prepared once; passing a raw string to jose re-constructs
+# the key object on every encode/decode
+_ACCESS_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
+_REFRESH_KEY = jwk.construct(REFRESH_SECRET_KEY, ALGORITHM)
+
+# Decoded access tokens, keyed by token digest -> (cache expiry, payload).
+# Entries never outlive the token's own exp claim.
+TOKEN_CACHE_TTL_SECONDS = 60
+TOKEN_CACHE_MAX_SIZE = 50_000
+_token_cache: Dict[bytes, Tuple[float, Dict]] = {}
+
 
 # ============================================
 # Password Hashing Functions
@@ -39,7 +69,8 @@ def hash_password(password: str) -> str:
     Returns:
         Hashed password string
     """
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS, prefix=BCRYPT_PREFIX)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -53,7 +84,40 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         True if password matches, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+    except ValueError:
+        # Malformed or non-bcrypt hash
+        return False
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password, run on the bcrypt pool (for async handlers)."""
+    return await asyncio.get_running_loop().run_in_executor(_BCRYPT_POOL, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password, run on the bcrypt pool (for async handlers)."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _BCRYPT_POOL, verify_password, plain_password, hashed_password
+    )
+
+
+# Checked against when a login email doesn't exist, so unknown accounts cost
+# the same bcrypt time as a wrong password and can't be told apart by timing
+DUMMY_PASSWORD_HASH = hash_password(os.urandom(16).hex())
+
+
+def benchmark_password_hash() -> float:
+    """
+    Time a single hash at the configured cost.
+    
+    Returns:
+        Milliseconds taken, for tuning BCRYPT_ROUNDS
+    """
+    start = time.perf_counter()
+    hash_password("benchmark-password")
+    return (time.perf_counter() - start) * 1000
 
 
 # ============================================
@@ -73,13 +137,10 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
     """
     to_encode = data.copy()
     
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + (expires_delta or _ACCESS_TOKEN_TTL)
     
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _ACCESS_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -94,9 +155,9 @@ def create_refresh_token(data: Dict) -> str:
         Encoded JWT refresh token string
     """
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    expire = datetime.utcnow() + _REFRESH_TOKEN_TTL
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(to_encode, REFRESH_SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _REFRESH_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -110,13 +171,31 @@ def verify_access_token(token: str) -> Optional[Dict]:
     Returns:
         Decoded token payload if valid, None otherwise
     """
+    key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    now = time.time()
+    hit = _token_cache.get(key)
+    if hit is not None:
+        if hit[0] > now:
+            return hit[1]
+        # pop, not del: sync routes run on worker threads and may race here
+        _token_cache.pop(key, None)
+    
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _ACCESS_KEY, algorithms=_ALGORITHMS)
         if payload.get("type") != "access":
             return None
-        return payload
     except JWTError:
         return None
+    
+    if len(_token_cache) >= TOKEN_CACHE_MAX_SIZE:
+        # Drop the oldest entry (dicts keep insertion order)
+        try:
+            _token_cache.pop(next(iter(_token_cache)), None)
+        except (StopIteration, RuntimeError):
+            # Another thread emptied or resized the cache meanwhile
+            pass
+    _token_cache[key] = (min(payload.get("exp", now), now + TOKEN_CACHE_TTL_SECONDS), payload)
+    return payload
 
 
 def verify_refresh_token(token: str) -> Optional[Dict]:
@@ -130,7 +209,7 @@ def verify_refresh_token(token: str) -> Optional[Dict]:
         Decoded token payload if valid, None otherwise
     """
     try:
-        payload = jwt.decode(token, REFRESH_SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _REFRESH_KEY, algorithms=_ALGORITHMS)
         if payload.get("type") != "refresh":
             return None
         return payload
@@ -170,9 +249,9 @@ def create_password_reset_token(email: str) -> str:
     Returns:
         JWT token for password reset
     """
-    expire = datetime.utcnow() + timedelta(hours=1)
+    expire = datetime.utcnow() + _RESET_TOKEN_TTL
     to_encode = {"sub": email, "exp": expire, "type": "password_reset"}
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _ACCESS_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
@@ -187,7 +266,7 @@ def verify_password_reset_token(token: str) -> Optional[str]:
         User's email if token is valid, None otherwise
     """
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, _ACCESS_KEY, algorithms=_ALGORITHMS)
         if payload.get("type") != "password_reset":
             return None
         email: str = payload.get("sub")
@@ -1,4 +1,6 @@
 from typing import Optional
+from functools import lru_cache
+import re
 
 MERCHANT_CATEGORY_HINTS = {
     "uber": "travel",
@@ -10,10 +12,15 @@ MERCHANT_CATEGORY_HINTS = {
     "cinema": "entertainment",
 }
 
+# All hints folded into one alternation so a merchant is scanned once,
+# rather than once per hint
+_HINT_PATTERN = re.compile("|".join(re.escape(k) for k in MERCHANT_CATEGORY_HINTS))
 
+
+# Merchant strings repeat heavily within a statement; memoize per process
+@lru_cache(maxsize=4096)
 def guess_category(merchant: str, fallback: Optional[str] = "uncategorized") -> str:
-    m = merchant.lower()
-    for k, v in MERCHANT_CATEGORY_HINTS.items():
-        if k in m:
-            return v
+    match = _HINT_PATTERN.search(merchant.lower())
+    if match:
+        return MERCHANT_CATEGORY_HINTS[match.group(0)]
     return fallback or "uncategorized"
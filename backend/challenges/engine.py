@@ -5,7 +5,8 @@ from models.schema import Insight, Challenge
 def propose_challenges(insights: List[Insight]) -> List[Challenge]:
     challenges: List[Challenge] = []
     for ins in insights:
-        if "binge" in (ins.linked_patterns or []):
+        linked = ins.linked_patterns or ()
+        if "binge" in linked:
             challenges.append(
                 Challenge(
                     id=None,
@@ -16,7 +17,7 @@ def propose_challenges(insights: List[Insight]) -> List[Challenge]:
                     status="proposed",
                 )
             )
-        if "weekend" in (ins.linked_patterns or []):
+        if "weekend" in linked:
             challenges.append(
                 Challenge(
                     id=None,
@@ -27,7 +28,7 @@ def propose_challenges(insights: List[Insight]) -> List[Challenge]:
                     status="proposed",
                 )
             )
-        if "payday" in (ins.linked_patterns or []):
+        if "payday" in linked:
             challenges.append(
                 Challenge(
                     id=None,
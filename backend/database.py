@@ -5,10 +5,12 @@ Database Configuration and Connection
 - Base model for all database models
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
+from datetime import date
+import orjson
 import os
 from dotenv import load_dotenv
 
@@ -32,7 +34,10 @@ engine = create_engine(
     pool_pre_ping=True,  # Verify connections before using
     pool_size=10 if "sqlite" not in DATABASE_URL else 5,  # Connection pool size
     max_overflow=20 if "sqlite" not in DATABASE_URL else 10,  # Max connections above pool_size
-    echo=os.getenv("DEBUG", "False").lower() == "true"  # Log SQL queries in debug mode
+    echo=os.getenv("DEBUG", "False").lower() == "true",  # Log SQL queries in debug mode
+    # JSON/JSONB columns are encoded and decoded with orjson
+    json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    json_deserializer=orjson.loads
 )
 
 # Create SessionLocal class
@@ -65,8 +70,117 @@ def init_db():
     Call this when starting the application.
     """
     Base.metadata.create_all(bind=engine)
+    migrate_transaction_dates()
+    migrate_json_columns()
+    backfill_metric_defaults()
     print("✓ Database tables created successfully")
 
+
+def migrate_transaction_dates():
+    """
+    One-shot migration: user_transactions.date used to be free-form VARCHAR(50).
+    
+    Legacy values are first normalized in place: full ISO timestamps are cut
+    to their 'YYYY-MM-DD' prefix, and anything unparseable ('' included)
+    falls back to the day the row was created. On PostgreSQL the column is
+    then converted to DATE so range predicates can use the index. SQLite
+    keeps the text, which SQLAlchemy's Date type reads as long as it is
+    plain 'YYYY-MM-DD' - so there the cleanup runs on every start, touching
+    only rows that aren't.
+    """
+    if engine.dialect.name == "postgresql":
+        columns = {c["name"]: c["type"] for c in inspect(engine).get_columns("user_transactions")}
+        if "date" not in columns or columns["date"].python_type is not str:
+            return
+        # Every distinct value is checked, since the pattern alone lets
+        # impossible dates like 2024-02-30 through
+        find_bad = "SELECT DISTINCT date FROM user_transactions"
+        created_day = "to_char(COALESCE(created_at, now()), 'YYYY-MM-DD')"
+    else:
+        # The '+0 days' modifier makes SQLite roll impossible days over
+        # (2024-02-30 -> 2024-03-01), so those don't compare equal either
+        find_bad = "SELECT DISTINCT date FROM user_transactions WHERE date(date, '+0 days') IS NOT date"
+        created_day = "COALESCE(date(created_at), date('now'))"
+    
+    try:
+        with engine.begin() as conn:
+            fixed = 0
+            for value in conn.execute(text(find_bad)).scalars().all():
+                try:
+                    normalized = date.fromisoformat(value[:10]).isoformat()
+                except (TypeError, ValueError):
+                    normalized = None
+                if normalized == value:
+                    continue
+                where = "date IS NULL" if value is None else "date = :value"
+                new_value = ":normalized" if normalized else created_day
+                fixed += conn.execute(
+                    text(f"UPDATE user_transactions SET date = {new_value} WHERE {where}"),
+                    {"value": value, "normalized": normalized}
+                ).rowcount
+            if fixed:
+                print(f"✓ Normalized {fixed} legacy transaction dates")
+            
+            if engine.dialect.name == "postgresql":
+                conn.execute(text(
+                    "ALTER TABLE user_transactions "
+                    "ALTER COLUMN date TYPE DATE USING date::date"
+                ))
+                print("✓ Migrated user_transactions.date to DATE")
+    except Exception as e:
+        print(f"⚠️ Could not migrate user_transactions.date to DATE: {e}")
+
+def migrate_json_columns():
+    """
+    One-shot migration: JSON documents used to be stored in TEXT columns.
+    
+    On PostgreSQL they are converted in place to JSONB. SQLite needs
+    nothing: SQLAlchemy's JSON type reads the existing JSON text as is.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    inspector = inspect(engine)
+    for table, column in (
+        ("user_financial_metrics", "savings_tips"),
+        ("user_analysis", "analysis_metadata"),
+    ):
+        columns = {c["name"]: c["type"] for c in inspector.get_columns(table)}
+        if column not in columns or columns[column].python_type is not str:
+            continue
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(
+                    f"ALTER TABLE {table} "
+                    f"ALTER COLUMN {column} TYPE JSONB USING NULLIF({column}, '')::jsonb"
+                ))
+            print(f"✓ Migrated {table}.{column} to JSONB")
+        except Exception as e:
+            print(f"⚠️ Could not migrate {table}.{column} to JSONB: {e}")
+
+
+def backfill_metric_defaults():
+    """
+    One-shot migration: financial metric inputs used to be nullable.
+    
+    Rows written before the NOT NULL/DEFAULT 0 change may still hold NULLs;
+    those are set to 0 so readers can use the values as plain floats.
+    """
+    columns = (
+        "monthly_income", "rent", "utilities", "tuition", "loans",
+        "insurance", "subscriptions", "other_expenses"
+    )
+    assignments = ", ".join(f"{c} = COALESCE({c}, 0)" for c in columns)
+    has_nulls = " OR ".join(f"{c} IS NULL" for c in columns)
+    try:
+        with engine.begin() as conn:
+            result = conn.execute(text(
+                f"UPDATE user_financial_metrics SET {assignments} WHERE {has_nulls}"
+            ))
+        if result.rowcount:
+            print(f"✓ Backfilled {result.rowcount} financial metric rows with 0 defaults")
+    except Exception as e:
+        print(f"⚠️ Could not backfill financial metric defaults: {e}")
+
 # Drop all tables (use with caution!)
 def drop_db():
     """
@@ -3,7 +3,8 @@ Simple Flask Backend - Much simpler than FastAPI!
 Run: python flask_server.py
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from functools import wraps
 import jwt
@@ -11,8 +12,20 @@ import bcrypt
 from datetime import datetime, timedelta
 import sqlite3
 import os
+import orjson
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, so jsonify() skips the stdlib encoder"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Enable CORS for frontend
 
 # Configuration
@@ -23,17 +36,44 @@ DATABASE = "mindspend.db"
 # Database Helper Functions
 # ============================================
 
-def get_db():
-    """Get database connection"""
+# Statements reused across requests (hits sqlite3's per-connection statement cache)
+SQL_INSERT_USER = 'INSERT INTO users (email, password_hash, username) VALUES (?, ?, ?)'
+SQL_INSERT_METRICS = 'INSERT INTO user_financial_metrics (user_id) VALUES (?)'
+
+def connect_db():
+    """Open a database connection with the per-connection settings applied"""
     conn = sqlite3.connect(DATABASE)
     conn.row_factory = sqlite3.Row
+    # journal_mode=WAL is stored in the database file (set once in
+    # init_database); these settings only last for the connection
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')
     return conn
 
+def get_db():
+    """Get the current request's database connection, opening it on first use"""
+    # app.run() serves each request on a fresh thread, so the connection is
+    # scoped to the request (flask.g) and closed in close_db
+    if 'db' not in g:
+        g.db = connect_db()
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exc):
+    """Close the request's database connection, if one was opened"""
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
+
 def init_database():
     """Initialize database tables"""
-    conn = get_db()
+    conn = connect_db()
     cursor = conn.cursor()
     
+    # Persistent: every later connection to the file uses WAL
+    cursor.execute('PRAGMA journal_mode=WAL')
+    
     # Users table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -60,6 +100,16 @@ def init_database():
         )
     ''')
     
+    # Per-user transaction lookups (newest first, and by category)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS ix_user_tx_user_date
+        ON user_transactions (user_id, date DESC)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS ix_user_tx_user_cat
+        ON user_transactions (user_id, category)
+    ''')
+    
     # User financial metrics table
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS user_financial_metrics (
@@ -161,15 +211,15 @@ def register():
     try:
         conn = get_db()
         cursor = conn.cursor()
-        cursor.execute('INSERT INTO users (email, password_hash, username) VALUES (?, ?, ?)',
-                      (email, password_hash, username))
+        # User and default metrics are written in one write transaction
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(SQL_INSERT_USER, (email, password_hash, username))
         user_id = cursor.lastrowid
         
         # Create default financial metrics
-        cursor.execute('INSERT INTO user_financial_metrics (user_id) VALUES (?)', (user_id,))
+        cursor.execute(SQL_INSERT_METRICS, (user_id,))
         
         conn.commit()
-        conn.close()
         
         # Create token
         token = create_token(user_id, email)
@@ -181,6 +231,7 @@ def register():
         }), 201
         
     except sqlite3.IntegrityError:
+        conn.rollback()
         return jsonify({'error': 'Email already registered'}), 400
 
 @app.route('/auth/login', methods=['POST'])
@@ -197,7 +248,6 @@ def login():
     cursor = conn.cursor()
     cursor.execute('SELECT id, password_hash FROM users WHERE email = ?', (email,))
     user = cursor.fetchone()
-    conn.close()
     
     if not user or not verify_password(password, user['password_hash']):
         return jsonify({'error': 'Invalid credentials'}), 401
@@ -239,7 +289,6 @@ def get_profile():
     cursor.execute('SELECT id, email, username, created_at FROM users WHERE id = ?', 
                   (request.user_id,))
     user = cursor.fetchone()
-    conn.close()
     
     return jsonify(dict(user))
 
@@ -252,7 +301,6 @@ def get_metrics():
     cursor.execute('SELECT * FROM user_financial_metrics WHERE user_id = ?', 
                   (request.user_id,))
     metrics = cursor.fetchone()
-    conn.close()
     
     if not metrics:
         return jsonify({'error': 'Metrics not found'}), 404
@@ -287,7 +335,6 @@ def update_metrics():
     ))
     
     conn.commit()
-    conn.close()
     
     return jsonify({'message': 'Metrics updated successfully'})
 
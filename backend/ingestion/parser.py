@@ -1,4 +1,4 @@
-from typing import List
+from typing import Callable, Iterable, List, Optional
 from models.schema import Transaction
 import csv
 import io
@@ -7,61 +7,119 @@ from datetime import datetime
 SCHEMA = ["date", "merchant", "amount", "base_category", "notes"]
 
 
+def _parse_ymd(s: str) -> datetime:
+    # Covers non-padded dates like 2024-1-5 that fromisoformat rejects,
+    # without going through strptime's format parsing
+    y, m, d = s.split("-")
+    return datetime(int(y), int(m), int(d))
+
+
+def _parse_dmy(s: str) -> datetime:
+    d, m, y = s.split("/")
+    return datetime(int(y), int(m), int(d))
+
+
+def _parse_mdy(s: str) -> datetime:
+    m, d, y = s.split("/")
+    return datetime(int(y), int(m), int(d))
+
+
+# Tried in order until one succeeds; the winner is then tried first for
+# the remaining rows, since a CSV almost always uses a single date format.
+DATE_PARSERS: List[Callable[[str], datetime]] = [
+    datetime.fromisoformat,
+    _parse_ymd,
+    _parse_dmy,
+    _parse_mdy,
+]
+
+
 def parse_csv_bytes(content: bytes) -> List[Transaction]:
     text = content.decode("utf-8", errors="ignore")
     return parse_csv_text(text)
 
 
 def parse_csv_text(text: str) -> List[Transaction]:
-    reader = csv.DictReader(io.StringIO(text))
-    # Try to standardize headers by lowercasing
-    field_map = {f.lower(): f for f in reader.fieldnames or []}
+    return parse_csv_stream(io.StringIO(text))
+
+
+def parse_csv_stream(lines: Iterable[str]) -> List[Transaction]:
+    """Parse CSV rows from any iterable of text lines (e.g. a decoded upload)."""
+    reader = csv.reader(lines)
+    # Resolve each logical column to a header position once, then index
+    # rows as plain lists (no per-row dict like csv.DictReader builds)
+    fieldnames = next(reader, [])
 
-    def get(row, key):
+    def column(key):
         # Support common variants like Date, Amount, Merchant
         for k in [key, key.title(), key.upper()]:
-            if k in row:
-                return row[k]
+            if k in fieldnames:
+                return fieldnames.index(k)
         # Fallback to lowercased matching
         lk = key.lower()
-        for k in row.keys():
+        for i, k in enumerate(fieldnames):
             if k.lower() == lk:
-                return row[k]
-        return None
+                return i
+        return -1
+
+    def get(row, idx):
+        return row[idx] if 0 <= idx < len(row) else None
+
+    date_col = column("date")
+    transaction_date_col = column("transaction_date")
+    merchant_col = column("merchant")
+    description_col = column("description")
+    amount_col = column("amount")
+    debit_col = column("debit")
+    credit_col = column("credit")
+    base_category_col = column("base_category")
+    category_col = column("category")
+    notes_col = column("notes")
 
     transactions: List[Transaction] = []
+    date_parser: Optional[Callable[[str], datetime]] = None
     for row in reader:
-        date_str = get(row, "date") or get(row, "transaction_date")
+        if not row:
+            # Blank line
+            continue
+        date_str = get(row, date_col) or get(row, transaction_date_col)
         if not date_str:
             # Skip rows without a date
             continue
-        merchant = (get(row, "merchant") or get(row, "description") or "").strip()
-        amount_str = get(row, "amount") or get(row, "debit") or get(row, "credit")
-        base_category = (get(row, "base_category") or get(row, "category") or "uncategorized").strip().lower()
-        notes = (get(row, "notes") or "").strip()
+        merchant = (get(row, merchant_col) or get(row, description_col) or "").strip()
+        amount_str = get(row, amount_col) or get(row, debit_col) or get(row, credit_col)
+        base_category = (get(row, base_category_col) or get(row, category_col) or "uncategorized").strip().lower()
+        notes = (get(row, notes_col) or "").strip()
 
         # Parse date and amount safely
-        try:
-            dt = datetime.fromisoformat(date_str)
-        except Exception:
+        dt: Optional[datetime] = None
+        if date_parser is not None:
             try:
-                dt = datetime.strptime(date_str, "%Y-%m-%d")
-            except Exception:
+                dt = date_parser(date_str)
+            except ValueError:
+                dt = None
+        if dt is None:
+            for candidate in DATE_PARSERS:
                 try:
-                    dt = datetime.strptime(date_str, "%d/%m/%Y")
-                except Exception:
-                    try:
-                        dt = datetime.strptime(date_str, "%m/%d/%Y")
-                    except Exception:
-                        # Skip unparseable dates
-                        continue
+                    dt = candidate(date_str)
+                except ValueError:
+                    continue
+                date_parser = candidate
+                break
+            else:
+                # Skip unparseable dates
+                continue
 
         amt = 0.0
         if amount_str is not None:
-            s = amount_str.replace(",", "").strip()
+            # Only copy the string when there is something to remove;
+            # float() itself tolerates surrounding whitespace
+            s = amount_str
+            if "," in s:
+                s = s.replace(",", "")
             try:
                 amt = float(s)
-            except Exception:
+            except ValueError:
                 amt = 0.0
 
         transactions.append(
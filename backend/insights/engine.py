@@ -4,7 +4,9 @@ from models.schema import BehaviorPattern, Trigger, Insight
 
 def synthesize_insights(patterns: List[BehaviorPattern], triggers: List[Trigger]) -> List[Insight]:
     insights: List[Insight] = []
-    if any(p.type == "binge" for p in patterns):
+    pattern_types = {p.type for p in patterns}
+    trigger_factors = {t.factor for t in triggers}
+    if "binge" in pattern_types:
         insights.append(
             Insight(
                 id=None,
@@ -15,7 +17,7 @@ def synthesize_insights(patterns: List[BehaviorPattern], triggers: List[Trigger]
                 linked_patterns=["binge"],
             )
         )
-    if any(t.factor == "weekend" for t in triggers):
+    if "weekend" in trigger_factors:
         insights.append(
             Insight(
                 id=None,
@@ -26,7 +28,7 @@ def synthesize_insights(patterns: List[BehaviorPattern], triggers: List[Trigger]
                 linked_patterns=["weekend"],
             )
         )
-    if any(t.factor == "payday" for t in triggers):
+    if "payday" in trigger_factors:
         insights.append(
             Insight(
                 id=None,
@@ -1,10 +1,32 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import atexit
+import queue
+import random
+import threading
+import time
+
+# Write-behind settings for save_analysis
+BATCH_MAX_WRITES = 40
+BATCH_INTERVAL_SECONDS = 0.05
+COMMIT_WORKERS = 10
+COMMIT_RETRIES = 3
+# Separate firebase apps -> separate gRPC channels, so concurrent commits
+# don't queue behind each other on one HTTP/2 connection
+FIRESTORE_POOL_SIZE = 8
+
 
 class FirebaseClient:
     """Firebase adapter with graceful fallback.
 
     If `firebase_admin` is available and a service account is provided,
     verifies ID tokens and writes to Firestore. Otherwise, stubs out.
+
+    Analysis snapshots are written behind: `save_analysis` only enqueues,
+    and a background thread commits them in Firestore batches. Request
+    handlers therefore never wait on Firestore, so the synchronous SDK is
+    kept rather than the async client (which would tie the adapter to one
+    event loop, while it is built at import time and also used from sync code).
     """
 
     def __init__(self, project_id: Optional[str] = None, service_account_path: Optional[str] = None):
@@ -12,6 +34,9 @@ class FirebaseClient:
         self._admin = None
         self._auth = None
         self._firestore = None
+        self._firestore_pool: List[Any] = []
+        self._pending: "queue.Queue[tuple]" = queue.Queue()
+        self._committer: Optional[ThreadPoolExecutor] = None
         try:
             import firebase_admin  # type: ignore
             from firebase_admin import credentials, auth
@@ -24,10 +49,28 @@ class FirebaseClient:
             self._admin = firebase_admin
             self._auth = auth
             self._firestore = firestore.client()
+            self._firestore_pool = [self._firestore]
         except Exception:
             self._admin = None
             self._auth = None
             self._firestore = None
+            self._firestore_pool = []
+        if self._firestore is not None:
+            # Extra channels are an optimization; if any fail, keep the
+            # working default client rather than disabling Firestore.
+            try:
+                for i in range(1, FIRESTORE_POOL_SIZE):
+                    name = f"pfba-pool-{i}"
+                    try:
+                        pool_app = firebase_admin.get_app(name)
+                    except ValueError:
+                        pool_app = firebase_admin.initialize_app(cred, name=name)
+                    self._firestore_pool.append(firestore.client(app=pool_app))
+            except Exception:
+                self._firestore_pool = [self._firestore]
+            self._committer = ThreadPoolExecutor(max_workers=COMMIT_WORKERS, thread_name_prefix="firestore-commit")
+            threading.Thread(target=self._drain_forever, name="firestore-batcher", daemon=True).start()
+            atexit.register(self.close)
 
     def verify_token(self, token: str) -> bool:
         if not token:
@@ -44,6 +87,60 @@ class FirebaseClient:
     def save_analysis(self, user_id: str, data: Dict[str, Any]) -> None:
         if self._firestore is None:
             return
-        doc_ref = self._firestore.collection("pfba_analyses").document(user_id)
-        # Store last analysis snapshot
-        doc_ref.set({"last": data}, merge=True)
+        # Store last analysis snapshot (committed by the batcher thread)
+        self._pending.put((user_id, data))
+
+    def close(self) -> None:
+        """Commit everything still queued and wait for in-flight batches."""
+        if self._committer is None:
+            return
+        self._commit(self._take_batch(block=False, limit=None))
+        self._committer.shutdown(wait=True)
+
+    def _take_batch(self, block: bool, limit: Optional[int] = BATCH_MAX_WRITES) -> Dict[str, Dict[str, Any]]:
+        # Keyed by user so repeated saves in one window collapse to the
+        # latest snapshot; the write is set(merge=True) so only it matters
+        writes: Dict[str, Dict[str, Any]] = {}
+        try:
+            user_id, data = self._pending.get(block=block)
+            writes[user_id] = data
+            while limit is None or len(writes) < limit:
+                user_id, data = self._pending.get_nowait()
+                writes[user_id] = data
+        except queue.Empty:
+            pass
+        return writes
+
+    def _drain_forever(self) -> None:
+        while True:
+            writes = self._take_batch(block=True)
+            if writes:
+                try:
+                    self._committer.submit(self._commit, writes)
+                except RuntimeError:
+                    # Pool already shut down by close(); commit inline
+                    self._commit(writes)
+            time.sleep(BATCH_INTERVAL_SECONDS)
+
+    def _fs(self) -> Any:
+        """Pick a pooled Firestore client at random."""
+        return self._firestore_pool[random.randrange(len(self._firestore_pool))]
+
+    def _commit(self, writes: Dict[str, Dict[str, Any]]) -> None:
+        if not writes:
+            return
+        for attempt in range(COMMIT_RETRIES):
+            try:
+                # A fresh pick per attempt also moves retries off a bad channel
+                fs = self._fs()
+                collection = fs.collection("pfba_analyses")
+                batch = fs.batch()
+                for user_id, data in writes.items():
+                    batch.set(collection.document(user_id), {"last": data}, merge=True)
+                batch.commit()
+                return
+            except Exception as e:
+                if attempt == COMMIT_RETRIES - 1:
+                    print(f"Failed to persist {len(writes)} analyses: {e}")
+                    return
+                time.sleep(0.1 * (2 ** attempt))
@@ -1,6 +1,26 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import threading
+from pydantic import TypeAdapter
 from models.schema import Insight
 
+# Built once: pydantic-core compiles the list validator a single time.
+# Insight instances pass through without re-validation; raw dicts (e.g.
+# straight from a JSON payload) are validated in one Rust-side call.
+_INSIGHT_LIST_ADAPTER = TypeAdapter(List[Insight])
+
+# Upper bound on concurrent generation requests per client
+MAX_CONCURRENT_REQUESTS = 8
+
+# Generated text is memoized by a digest of its context: in-process LRU
+# first, then Redis (when REDIS_URL is set) so workers share results
+TEXT_CACHE_SIZE = 10_000
+TEXT_CACHE_REDIS_TTL_SECONDS = 24 * 60 * 60
+
 class GeminiClient:
     """Stubbed Gemini adapter.
 
@@ -9,16 +29,66 @@ class GeminiClient:
 
     def __init__(self, api_key: Optional[str] = None):
         self.api_key = api_key
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._text_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._text_cache_lock = threading.Lock()
+        self._redis = None
+        try:
+            import redis  # type: ignore
+            if os.getenv("REDIS_URL"):
+                self._redis = redis.Redis.from_url(os.environ["REDIS_URL"], decode_responses=True)
+        except Exception:
+            self._redis = None
 
     def generate_insight_text(self, context: Dict[str, Any]) -> str:
+        key = hashlib.blake2b(json.dumps(context, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+        with self._text_cache_lock:
+            text = self._text_cache.get(key)
+            if text is not None:
+                self._text_cache.move_to_end(key)
+                return text
+        text = self._redis_get(key)
+        if text is None:
+            text = self._call_gemini(context)
+            self._redis_set(key, text)
+        with self._text_cache_lock:
+            self._text_cache[key] = text
+            if len(self._text_cache) > TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
+        return text
+
+    def _call_gemini(self, context: Dict[str, Any]) -> str:
         # TODO: call Gemini; for now, return a templated message
         return "Based on your recent patterns, consider simple caps and cooldowns to reduce impulse purchases."
 
-    def enhance_insights(self, insights: List[Insight]) -> List[Insight]:
+    def _redis_get(self, key: str) -> Optional[str]:
+        if self._redis is None:
+            return None
+        try:
+            return self._redis.get(f"gemini:text:{key}")
+        except Exception:
+            return None
+
+    def _redis_set(self, key: str, text: str) -> None:
+        if self._redis is None:
+            return
+        try:
+            self._redis.set(f"gemini:text:{key}", text, ex=TEXT_CACHE_REDIS_TTL_SECONDS)
+        except Exception:
+            pass
+
+    def enhance_insights(self, insights: List[Union[Insight, Dict[str, Any]]]) -> List[Insight]:
         # Stub: augment detail field with a generic line
-        updated: List[Insight] = []
-        for i in insights:
-            if not i.detail:
-                i.detail = self.generate_insight_text({"summary": i.summary})
-            updated.append(i)
+        updated: List[Insight] = _INSIGHT_LIST_ADAPTER.validate_python(insights)
+        missing = [i for i in updated if not i.detail]
+        if len(missing) == 1:
+            missing[0].detail = self.generate_insight_text({"summary": missing[0].summary})
+        elif missing:
+            # Issue the generation calls concurrently so N insights cost
+            # about ceil(N / MAX_CONCURRENT_REQUESTS) round-trips, not N
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="gemini")
+            texts = self._pool.map(self.generate_insight_text, [{"summary": i.summary} for i in missing])
+            for i, text in zip(missing, texts):
+                i.detail = text
         return updated
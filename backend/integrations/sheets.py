@@ -1,17 +1,44 @@
-from typing import Any, Dict, Optional
-from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+import atexit
+import threading
+import time
+
+# Summary rows are buffered and appended in bulk
+FLUSH_INTERVAL_SECONDS = 2.0
+FLUSH_MAX_ROWS = 100
+
+
+@lru_cache(maxsize=64)
+def _iso_second(epoch_seconds: int) -> str:
+    """UTC ISO-8601 timestamp for a whole second; exports within the same second reuse it."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(epoch_seconds))
+
 
 class SheetsClient:
     """Google Sheets adapter with graceful fallback to stub.
 
     If `gspread` is installed and credentials are provided, writes to a real spreadsheet.
     Otherwise, returns a stub URL.
+
+    Spreadsheet handles are cached per user, and rows are appended in
+    batches (one values.append call per sheet per flush) by a background
+    thread rather than one API round-trip per export.
     """
 
     def __init__(self, credentials_json: Optional[str] = None):
         self.credentials_json = credentials_json
         self._gspread = None
         self._client = None
+        # user_id -> (spreadsheet, worksheet)
+        self._sheets: Dict[str, Tuple[Any, Any]] = {}
+        self._pending_rows: Dict[str, List[List[str]]] = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        # Serializes first-time open/create so concurrent exports for a new
+        # user can't create the spreadsheet twice
+        self._open_lock = threading.Lock()
+        self._flush_requested = threading.Event()
         try:
             import gspread  # type: ignore
             self._gspread = gspread
@@ -20,27 +47,66 @@ class SheetsClient:
         except Exception:
             self._gspread = None
             self._client = None
+        if self._client is not None:
+            threading.Thread(target=self._flush_forever, name="sheets-flusher", daemon=True).start()
+            atexit.register(self.flush)
 
     def export_summary(self, user_id: str, summary: Dict[str, Any]) -> str:
         """Export summary to a sheet and return a URL.
 
-        Real mode: creates/opens a spreadsheet named `PFBA_{user_id}` and appends a row.
+        Real mode: creates/opens a spreadsheet named `PFBA_{user_id}` and queues a row
+        for the next batched append.
         Stub mode: returns a fake URL.
         """
         if self._client is None:
             return f"https://sheets.local/stub/{user_id}/summary"
-        title = f"PFBA_{user_id}"
-        # Try open; else create
-        try:
-            sh = self._client.open(title)
-        except Exception:
-            sh = self._client.create(title)
-        try:
-            ws = sh.sheet1
-        except Exception:
-            ws = sh.add_worksheet(title="Summary", rows=100, cols=20)
+        sh, _ = self._sheet_for(user_id)
         # Append timestamped summary key-values
-        ts = datetime.utcnow().isoformat()
+        ts = _iso_second(int(time.time()))
         row = [ts] + [f"{k}={summary.get(k)}" for k in sorted(summary.keys())]
-        ws.append_row(row)
+        with self._lock:
+            self._pending_rows.setdefault(user_id, []).append(row)
+            self._pending_count += 1
+            if self._pending_count >= FLUSH_MAX_ROWS:
+                self._flush_requested.set()
         return sh.url
+
+    def flush(self) -> None:
+        """Append all buffered rows now."""
+        with self._lock:
+            pending, self._pending_rows = self._pending_rows, {}
+            self._pending_count = 0
+        for user_id, rows in pending.items():
+            _, ws = self._sheet_for(user_id)
+            try:
+                ws.append_rows(rows)
+            except Exception as e:
+                print(f"Failed to append {len(rows)} summary rows for {user_id}: {e}")
+
+    def _sheet_for(self, user_id: str) -> Tuple[Any, Any]:
+        cached = self._sheets.get(user_id)
+        if cached is not None:
+            return cached
+        with self._open_lock:
+            cached = self._sheets.get(user_id)
+            if cached is not None:
+                return cached
+            title = f"PFBA_{user_id}"
+            # Try open; else create
+            try:
+                sh = self._client.open(title)
+            except Exception:
+                sh = self._client.create(title)
+            try:
+                ws = sh.sheet1
+            except Exception:
+                ws = sh.add_worksheet(title="Summary", rows=100, cols=20)
+            self._sheets[user_id] = (sh, ws)
+            return sh, ws
+
+    def _flush_forever(self) -> None:
+        while True:
+            self._flush_requested.wait(FLUSH_INTERVAL_SECONDS)
+            self._flush_requested.clear()
+            if self._pending_count:
+                self.flush()
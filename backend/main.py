@@ -7,90 +7,217 @@ FastAPI Main Application
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import logging.handlers
 import os
+import queue
+import random
+import time
 from dotenv import load_dotenv
 
 from database import init_db, engine
 from auth.routes import router as auth_router
 from routes.user import router as user_router
+from auth.security import BCRYPT_ROUNDS, benchmark_password_hash
 
 # Load environment variables
 load_dotenv()
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Logging: handlers only enqueue records; a background listener thread does
+# the actual stream I/O, so request coroutines never block on stdout.
+logger = logging.getLogger("mindspend")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+# Started/stopped with the app; records logged before startup wait in the queue
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+
+# ============================================
+# Startup/Shutdown (lifespan)
+# ============================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database on startup, release connections on shutdown"""
+    _log_listener.start()
+    try:
+        logger.info("🚀 Starting Personal Behavioral Analyst API...")
+        logger.info("📊 Initializing database...")
+        # Blocking DDL and the bcrypt benchmark run off the event loop
+        await asyncio.to_thread(init_db)
+        logger.info("✅ Database ready")
+        hash_ms = await asyncio.to_thread(benchmark_password_hash)
+        logger.info(f"🔐 bcrypt cost {BCRYPT_ROUNDS}: {hash_ms:.0f} ms/hash")
+    except Exception as e:
+        logger.exception(f"❌ Error during startup: {e}")
+    
+    yield
+    
+    try:
+        logger.info("👋 Shutting down API...")
+        await asyncio.to_thread(engine.dispose)
+    except Exception as e:
+        logger.exception(f"Error during shutdown: {e}")
+    finally:
+        # Drains any queued records before the process exits
+        _log_listener.stop()
+
 
 # Create FastAPI app
 app = FastAPI(
     title="Personal Behavioral Analyst API",
     description="Backend API for financial analytics and behavioral insights",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
-# Add rate limiter to app state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 
 # ============================================
 # Middleware Configuration
 # ============================================
 
-# CORS Middleware
-allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:8000").split(",")
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=allowed_origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+class CombinedMiddleware(CORSMiddleware):
+    """
+    CORS and the unhandled-exception catch-all in one pure ASGI layer.
+    
+    Preflights are answered straight from the CORS headers precomputed in
+    CORSMiddleware.__init__. Everything else reaches the app through
+    `_guarded`, which runs inside CORS's send wrapper, so 500 responses
+    still carry CORS headers (an @app.exception_handler(Exception) runs in
+    Starlette's outermost ServerErrorMiddleware, outside CORS).
+    """
+    
+    def __init__(self, app, **cors_options):
+        super().__init__(self._guarded, **cors_options)
+        self.inner = app
+    
+    async def _guarded(self, scope, receive, send):
+        response_started = False
+        
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.inner(scope, receive, send_wrapper)
+        except Exception as exc:
+            if scope["type"] != "http":
+                raise
+            logger.exception(f"Unhandled error: {exc}")
+            if response_started:
+                # Too late to send a clean 500; let the server drop the connection
+                raise
+            response = ORJSONResponse(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                content={
+                    "success": False,
+                    "detail": "Internal server error"
+                }
+            )
+            await response(scope, receive, send)
 
 
-# Global Exception Handler
-@app.exception_handler(Exception)
-async def global_exception_handler(request: Request, exc: Exception):
-    """Catch all unhandled exceptions"""
-    print(f"Unhandled error: {exc}")
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={
-            "success": False,
-            "detail": "Internal server error"
-        }
-    )
+# Optional: Redis-backed rate limiting
+try:
+    import redis.asyncio as aioredis  # type: ignore
+except ImportError:
+    aioredis = None
 
+# Atomically trims the window, checks the count and records the request,
+# so concurrent workers can't race past the limit
+ROLLING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+return 1
+"""
 
-# ============================================
-# Startup/Shutdown Events
-# ============================================
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database on startup"""
-    try:
-        print("🚀 Starting Personal Behavioral Analyst API...")
-        print("📊 Initializing database...")
-        init_db()
-        print("✅ Database ready")
-    except Exception as e:
-        print(f"❌ Error during startup: {e}")
-        import traceback
-        traceback.print_exc()
+class RedisRollingLimiter:
+    """
+    Pure ASGI per-client rate limiter backed by a Redis sorted set.
+    
+    Limits are shared across workers and instances. Fails open if Redis
+    is unreachable so an outage doesn't take the API down with it.
+    """
+    
+    # Not counted: liveness probes must keep working while a client is limited
+    EXEMPT_PATHS = frozenset({"/health"})
+    
+    def __init__(self, app, redis_url: str, limit: int, window_ms: int = 60_000):
+        self.app = app
+        self.limit = limit
+        self.window_ms = window_ms
+        self.redis = aioredis.Redis.from_url(redis_url)
+        # Runs via EVALSHA, re-loading the script if Redis no longer has it
+        self.script = self.redis.register_script(ROLLING_WINDOW_LUA)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        now_ms = int(time.time() * 1000)
+        try:
+            # Own key namespace: the login limiter in auth/routes.py keeps
+            # plain counters under ratelimit:auth:, a different Redis type
+            allowed = await self.script(
+                keys=[f"ratelimit:global:{client_ip}"],
+                args=[now_ms, self.window_ms, self.limit, f"{now_ms}-{random.getrandbits(32)}"]
+            )
+        except Exception as e:
+            logger.warning(f"Rate limiter unavailable: {e}")
+            allowed = 1
+        
+        if not allowed:
+            response = ORJSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={
+                    "success": False,
+                    "detail": "Rate limit exceeded"
+                },
+                headers={"Retry-After": str(self.window_ms // 1000)}
+            )
+            await response(scope, receive, send)
+            return
+        
+        await self.app(scope, receive, send)
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    try:
-        print("👋 Shutting down API...")
-        engine.dispose()
-    except Exception as e:
-        print(f"Error during shutdown: {e}")
+# Rate limiting (only with Redis, so limits hold across workers)
+redis_url = os.getenv("REDIS_URL")
+if redis_url and aioredis is not None:
+    app.add_middleware(
+        RedisRollingLimiter,
+        redis_url=redis_url,
+        limit=int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+    )
+elif redis_url:
+    logger.warning("⚠️ REDIS_URL is set but redis is not installed; rate limiting disabled")
+
+# CORS + error handling (outermost, so preflights short-circuit before anything else)
+allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:8000").split(",")
+app.add_middleware(
+    CombinedMiddleware,
+    allow_origins=allowed_origins,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
 
 
 # ============================================
@@ -30,7 +30,8 @@ def get_current_user_token(
     """
     token = credentials.credentials
     
-    # Verify token
+    # Verify token (repeat presentations of a token are served from
+    # verify_access_token's short-lived cache, skipping the HMAC check)
     payload = verify_access_token(token)
     if not payload:
         raise HTTPException(
@@ -8,11 +8,43 @@ Database Models
 - Guest data migration tracking
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Text, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, Text, ForeignKey, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from sqlalchemy.sql.functions import FunctionElement
 from database import Base
 
+
+class utcnow(FunctionElement):
+    """
+    Current UTC time, evaluated by the database inside the INSERT/UPDATE.
+    
+    Used as the column default instead of the Python datetime.utcnow
+    callable, so timestamps cost no Python call per row. Being a SQL
+    expression default (not server_default) it needs no schema change.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+
+# JSON documents: JSONB on PostgreSQL (parsed once on write, returned as
+# Python objects by the driver), JSON text elsewhere. Python None is stored
+# as SQL NULL rather than a JSON 'null'.
+JSONDocument = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+
 class User(Base):
     """User account model"""
     __tablename__ = "users"
@@ -24,14 +56,15 @@ class User(Base):
     last_name = Column(String(100), nullable=True)
     bio = Column(Text, nullable=True)
     password_hash = Column(String(255), nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow(), nullable=False)
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     is_active = Column(Boolean, default=True)
     
     # Relationships
     transactions = relationship("UserTransaction", back_populates="user", cascade="all, delete-orphan")
     analysis = relationship("UserAnalysis", back_populates="user", cascade="all, delete-orphan")
-    financial_metrics = relationship("UserFinancialMetrics", back_populates="user", cascade="all, delete-orphan")
+    # One metrics row per user (see get_current_user_with_metrics)
+    financial_metrics = relationship("UserFinancialMetrics", back_populates="user", uselist=False, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email})>"
@@ -42,20 +75,23 @@ class UserTransaction(Base):
     __tablename__ = "user_transactions"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    date = Column(String(50), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    date = Column(Date, nullable=False)
     amount = Column(Float, nullable=False)
     category = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
     
     # Relationship
     user = relationship("User", back_populates="transactions")
     
-    # Index for faster queries
+    # Index for faster queries; amount is the trailing key so per-user
+    # SUM(amount) by date/category is answered from the index alone.
+    # (user_id, date) also serves get_transactions' ORDER BY date DESC
+    # LIMIT as a backward range scan, with no sort step.
     __table_args__ = (
-        Index('idx_user_date', 'user_id', 'date'),
-        Index('idx_user_category', 'user_id', 'category'),
+        Index('idx_user_date_amount', 'user_id', 'date', 'amount'),
+        Index('idx_user_cat_amount', 'user_id', 'category', 'amount'),
     )
     
     def __repr__(self):
@@ -67,15 +103,20 @@ class UserAnalysis(Base):
     __tablename__ = "user_analysis"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     analysis_type = Column(String(50), nullable=False)  # 'patterns', 'triggers', 'recommendations'
     content = Column(Text, nullable=False)
-    analysis_metadata = Column(Text, nullable=True)  # JSON string for additional data (renamed from metadata)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    analysis_metadata = Column(JSONDocument, nullable=True)  # Additional data (renamed from metadata)
+    created_at = Column(DateTime, default=utcnow())
     
     # Relationship
     user = relationship("User", back_populates="analysis")
     
+    # Per-user history in chronological order (covers user_id lookups too)
+    __table_args__ = (
+        Index('idx_analysis_user_created', 'user_id', 'created_at'),
+    )
+    
     def __repr__(self):
         return f"<Analysis(id={self.id}, user_id={self.user_id}, type={self.analysis_type})>"
 
@@ -85,32 +126,32 @@ class UserFinancialMetrics(Base):
     __tablename__ = "user_financial_metrics"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    
-    # Income & Expenses
-    monthly_income = Column(Float, default=0.0)
-    rent = Column(Float, default=0.0)
-    utilities = Column(Float, default=0.0)
-    tuition = Column(Float, default=0.0)
-    loans = Column(Float, default=0.0)
-    insurance = Column(Float, default=0.0)
-    subscriptions = Column(Float, default=0.0)
-    other_expenses = Column(Float, default=0.0)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Income & Expenses (never NULL, so reads need no fallback)
+    monthly_income = Column(Float, nullable=False, default=0.0, server_default="0")
+    rent = Column(Float, nullable=False, default=0.0, server_default="0")
+    utilities = Column(Float, nullable=False, default=0.0, server_default="0")
+    tuition = Column(Float, nullable=False, default=0.0, server_default="0")
+    loans = Column(Float, nullable=False, default=0.0, server_default="0")
+    insurance = Column(Float, nullable=False, default=0.0, server_default="0")
+    subscriptions = Column(Float, nullable=False, default=0.0, server_default="0")
+    other_expenses = Column(Float, nullable=False, default=0.0, server_default="0")
     
     # Calculated fields
     total_expenses = Column(Float, default=0.0)
     disposable_income = Column(Float, default=0.0)
     
     # Savings tips
-    savings_tips = Column(Text, nullable=True)  # JSON array of tips
+    savings_tips = Column(JSONDocument, nullable=True)  # Array of tip objects
     
     # Highest spending category
     highest_category = Column(String(100), nullable=True)
     highest_amount = Column(Float, default=0.0)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), onupdate=utcnow())
     
     # Relationship
     user = relationship("User", back_populates="financial_metrics")
@@ -124,11 +165,11 @@ class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     token = Column(String(255), unique=True, index=True, nullable=False)
     expires_at = Column(DateTime, nullable=False)
     used = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=utcnow())
     
     def __repr__(self):
         return f"<PasswordResetToken(user_id={self.user_id}, used={self.used})>"
@@ -139,9 +180,9 @@ class GuestDataMigration(Base):
     __tablename__ = "guest_data_migration"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     guest_data = Column(Text, nullable=False)  # JSON string of guest transactions
-    migrated_at = Column(DateTime, default=datetime.utcnow)
+    migrated_at = Column(DateTime, default=utcnow())
     transaction_count = Column(Integer, default=0)
     
     def __repr__(self):
@@ -3,19 +3,30 @@ PDF Export Routes - Generate professional PDF reports with charts
 """
 
 from fastapi import APIRouter, HTTPException, Body
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
+from collections import OrderedDict
 from datetime import datetime
-import json
+import base64
+import copy
+import hashlib
 import io
-from typing import Optional, Dict, List, Any
+import threading
+import orjson
+from typing import Any, BinaryIO, Dict, List, Optional
 
 try:
+    from reportlab import rl_config
+    # Skip per-attribute validation on graphics shapes; must be set before
+    # reportlab.graphics is first imported, which reads it at import time
+    rl_config.shapeChecking = 0
     from reportlab.lib.pagesizes import letter, A4
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import inch
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
     from reportlab.lib.colors import HexColor, grey
     from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+    from reportlab.lib.utils import ImageReader
     REPORTLAB_AVAILABLE = True
 except ImportError:
     REPORTLAB_AVAILABLE = False
@@ -30,6 +41,201 @@ BORDER_COLOR = HexColor("#e0ddd5")
 LIGHT_BG = HexColor("#f9f8f6")
 
 
+# ============================================
+# REPORT STYLES (built once at import)
+# ============================================
+
+_STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=24,
+    textColor=DARK_COLOR,
+    spaceAfter=6,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_STYLES['Heading2'],
+    fontSize=14,
+    textColor=PRIMARY_COLOR,
+    spaceAfter=12,
+    spaceBefore=12,
+    fontName='Helvetica-Bold'
+)
+
+SUBHEADING_STYLE = ParagraphStyle(
+    'CustomSubHeading',
+    parent=_STYLES['Heading3'],
+    fontSize=11,
+    textColor=TEXT_COLOR,
+    spaceAfter=6,
+    fontName='Helvetica'
+)
+
+NORMAL_STYLE = ParagraphStyle(
+    'CustomNormal',
+    parent=_STYLES['Normal'],
+    fontSize=10,
+    textColor=TEXT_COLOR,
+    spaceAfter=6,
+    alignment=TA_LEFT
+)
+
+CHART_TITLE_STYLE = ParagraphStyle(
+    'ChartTitle',
+    parent=_STYLES['Heading3'],
+    fontSize=12,
+    textColor=PRIMARY_COLOR,
+    spaceAfter=6,
+    spaceBefore=8,
+    fontName='Helvetica-Bold'
+)
+
+CHART_DESC_STYLE = ParagraphStyle(
+    'ChartDesc',
+    parent=_STYLES['Normal'],
+    fontSize=9,
+    textColor=TEXT_COLOR,
+    spaceAfter=12,
+    leading=11
+)
+
+FOOTER_STYLE = ParagraphStyle(
+    'Footer',
+    parent=_STYLES['Normal'],
+    fontSize=8,
+    textColor=grey,
+    alignment=TA_CENTER
+)
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    # Header styling
+    ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_COLOR),
+    ('TEXTCOLOR', (0, 0), (-1, 0), 'white'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, 0), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    
+    # Row styling
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 1), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
+    ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+    
+    # Alternating row colors
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [LIGHT_BG, 'white']),
+    
+    # Borders
+    ('GRID', (0, 0), (-1, -1), 1, BORDER_COLOR),
+])
+
+# Static paragraphs parsed once at import. Each build gets a shallow copy:
+# the parsed fragments are shared, while the layout state that wrap()/split()
+# set lands on the copy, so concurrent builds don't interfere.
+FOOTER_TEXT = "This report was generated by MindSpend Labs - Personal Behavioral Analyst"
+_FOOTER_PARAGRAPH = Paragraph(FOOTER_TEXT, FOOTER_STYLE)
+_SECTION_HEADINGS = {
+    name: Paragraph(name, HEADING_STYLE)
+    for name in ("Summary Statistics", "Financial Charts", "Key Insights")
+}
+
+
+def _static(paragraph: "Paragraph") -> "Paragraph":
+    return copy.copy(paragraph)
+
+
+# Summary table rows, in display order: (key, label, format for float values)
+SUMMARY_METRICS = (
+    ('total_income', 'Total Income', '₹{:,.2f}'),
+    ('total_expenses', 'Total Expenses', '₹{:,.2f}'),
+    ('net_savings', 'Net Savings', '₹{:,.2f}'),
+    ('savings_rate', 'Savings Rate', '{:.1f}%'),
+    ('daily_average_expense', 'Daily Average', '₹{:,.2f}'),
+    ('largest_expense', 'Largest Expense', '₹{:,.2f}'),
+)
+
+# Chart information, in display order
+CHART_INFO = {
+    'monthly': {
+        'name': 'Monthly Expenses',
+        'description': 'Shows your total spending by month. Use this to track spending trends over time and identify high-spending months.'
+    },
+    'category': {
+        'name': 'Expenses by Category',
+        'description': 'Breakdown of your expenses across different categories. Helps identify which areas consume the most of your budget.'
+    },
+    'weekly': {
+        'name': 'Weekly Spending Trend',
+        'description': 'Displays spending patterns throughout the week. Useful for understanding which days of the week you spend more.'
+    },
+    'incomeExpense': {
+        'name': 'Income vs Expenses',
+        'description': 'Compares your total income against total expenses. Shows your net savings position visually.'
+    },
+    'topTrans': {
+        'name': 'Top 10 Transactions',
+        'description': 'Lists your largest transactions. Helps identify major expenses that significantly impact your budget.'
+    },
+    'daily': {
+        'name': 'Daily Spending Pattern',
+        'description': 'Shows daily spending variations. Useful for understanding daily financial habits and identifying unusual spending days.'
+    }
+}
+
+
+# Chart title/description paragraphs, parsed once (see _static)
+_CHART_PARAGRAPHS = {
+    key: (Paragraph(info['name'], CHART_TITLE_STYLE), Paragraph(info['description'], CHART_DESC_STYLE))
+    for key, info in CHART_INFO.items()
+}
+
+
+# Decoded chart images keyed by a digest of their base64 data URL. The
+# cached ImageReader holds the decoded pixel data, so re-exports of the same
+# charts skip both the base64 and the PNG decode.
+CHART_CACHE_SIZE = 256
+_chart_cache: "OrderedDict[bytes, ImageReader]" = OrderedDict()
+# PDFs are built on worker threads, so cache updates are serialized
+_chart_cache_lock = threading.Lock()
+
+
+def _decode_chart(data_url: str) -> "ImageReader":
+    key = hashlib.blake2b(data_url.encode(), digest_size=16).digest()
+    with _chart_cache_lock:
+        reader = _chart_cache.get(key)
+        if reader is not None:
+            _chart_cache.move_to_end(key)
+            return reader
+    reader = ImageReader(io.BytesIO(base64.b64decode(data_url.split(',')[-1])))
+    # Decode pixels now: PIL's lazy load isn't safe once the reader is shared
+    reader.getRGBData()
+    with _chart_cache_lock:
+        _chart_cache[key] = reader
+        if len(_chart_cache) > CHART_CACHE_SIZE:
+            _chart_cache.popitem(last=False)
+    return reader
+
+
+class _ChartImage(Image):
+    """Image flowable drawn from a shared, already-decoded ImageReader."""
+    
+    def __init__(self, reader: "ImageReader", width: float, height: float):
+        # Image() only takes a filename or file object; setting _img up
+        # front keeps its lazy __getattr__ from building a fresh reader
+        self._img = reader
+        super().__init__(io.BytesIO(), width=width, height=height)
+
+
 def create_styled_pdf(
     filename: str,
     title: str,
@@ -50,14 +256,34 @@ def create_styled_pdf(
     Returns:
         PDF bytes
     """
+    pdf_buffer = io.BytesIO()
+    write_styled_pdf(pdf_buffer, title, summary_data, charts_data, insights)
+    return pdf_buffer.getvalue()
+
+
+def write_styled_pdf(
+    output: BinaryIO,
+    title: str,
+    summary_data: Dict[str, Any],
+    charts_data: Optional[Dict[str, str]] = None,
+    insights: Optional[str] = None
+) -> None:
+    """
+    Build the report described in create_styled_pdf directly into `output`.
+    
+    Args:
+        output: Writable binary file object (e.g. BytesIO or an open file)
+        title: Report title
+        summary_data: Dictionary with metrics (total_expenses, total_income, etc.)
+        charts_data: Optional dict with chart names as keys and base64 images as values
+        insights: Optional insights text
+    """
     
     if not REPORTLAB_AVAILABLE:
         raise ValueError("ReportLab not installed. Run: pip install reportlab")
     
-    # Create PDF in memory
-    pdf_buffer = io.BytesIO()
     doc = SimpleDocTemplate(
-        pdf_buffer,
+        output,
         pagesize=A4,
         rightMargin=0.75 * inch,
         leftMargin=0.75 * inch,
@@ -68,56 +294,16 @@ def create_styled_pdf(
     # Container for PDF elements
     elements = []
     
-    # Define styles
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=DARK_COLOR,
-        spaceAfter=6,
-        alignment=TA_CENTER,
-        fontName='Helvetica-Bold'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=PRIMARY_COLOR,
-        spaceAfter=12,
-        spaceBefore=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    subheading_style = ParagraphStyle(
-        'CustomSubHeading',
-        parent=styles['Heading3'],
-        fontSize=11,
-        textColor=TEXT_COLOR,
-        spaceAfter=6,
-        fontName='Helvetica'
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=TEXT_COLOR,
-        spaceAfter=6,
-        alignment=TA_LEFT
-    )
-    
     # ============================================
     # TITLE SECTION
     # ============================================
     
-    elements.append(Paragraph(title or "MindSpend Analytics Report", title_style))
+    elements.append(Paragraph(title or "MindSpend Analytics Report", TITLE_STYLE))
     elements.append(Spacer(1, 0.15 * inch))
     
     # Report date
     date_text = f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}"
-    elements.append(Paragraph(date_text, normal_style))
+    elements.append(Paragraph(date_text, NORMAL_STYLE))
     elements.append(Spacer(1, 0.3 * inch))
     
     # ============================================
@@ -125,31 +311,18 @@ def create_styled_pdf(
     # ============================================
     
     if summary_data:
-        elements.append(Paragraph("Summary Statistics", heading_style))
+        elements.append(_static(_SECTION_HEADINGS["Summary Statistics"]))
         
         # Create summary table
         summary_rows = [['Metric', 'Value']]
         
-        # Add data rows
-        metrics_to_show = [
-            ('total_income', 'Total Income'),
-            ('total_expenses', 'Total Expenses'),
-            ('net_savings', 'Net Savings'),
-            ('savings_rate', 'Savings Rate'),
-            ('daily_average_expense', 'Daily Average'),
-            ('largest_expense', 'Largest Expense'),
-        ]
-        
-        for key, label in metrics_to_show:
+        for key, label, float_format in SUMMARY_METRICS:
             if key in summary_data:
                 value = summary_data[key]
                 
                 # Format value
                 if isinstance(value, float):
-                    if key == 'savings_rate':
-                        formatted_value = f"{value:.1f}%"
-                    else:
-                        formatted_value = f"₹{value:,.2f}"
+                    formatted_value = float_format.format(value)
                 else:
                     formatted_value = str(value)
                 
@@ -157,32 +330,7 @@ def create_styled_pdf(
         
         # Create table
         summary_table = Table(summary_rows, colWidths=[2.5 * inch, 2.5 * inch])
-        summary_table.setStyle(TableStyle([
-            # Header styling
-            ('BACKGROUND', (0, 0), (-1, 0), PRIMARY_COLOR),
-            ('TEXTCOLOR', (0, 0), (-1, 0), 'white'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            
-            # Row styling
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
-            ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
-            ('TOPPADDING', (0, 1), (-1, -1), 6),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-            ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
-            
-            # Alternating row colors
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [LIGHT_BG, 'white']),
-            
-            # Borders
-            ('GRID', (0, 0), (-1, -1), 1, BORDER_COLOR),
-        ]))
+        summary_table.setStyle(SUMMARY_TABLE_STYLE)
         
         elements.append(summary_table)
         elements.append(Spacer(1, 0.3 * inch))
@@ -192,94 +340,35 @@ def create_styled_pdf(
     # ============================================
     
     if charts_data:
-        elements.append(Paragraph("Financial Charts", heading_style))
+        elements.append(_static(_SECTION_HEADINGS["Financial Charts"]))
         elements.append(Spacer(1, 0.15 * inch))
         
-        # Chart information
-        chart_info = {
-            'monthly': {
-                'name': 'Monthly Expenses',
-                'description': 'Shows your total spending by month. Use this to track spending trends over time and identify high-spending months.'
-            },
-            'category': {
-                'name': 'Expenses by Category',
-                'description': 'Breakdown of your expenses across different categories. Helps identify which areas consume the most of your budget.'
-            },
-            'weekly': {
-                'name': 'Weekly Spending Trend',
-                'description': 'Displays spending patterns throughout the week. Useful for understanding which days of the week you spend more.'
-            },
-            'incomeExpense': {
-                'name': 'Income vs Expenses',
-                'description': 'Compares your total income against total expenses. Shows your net savings position visually.'
-            },
-            'topTrans': {
-                'name': 'Top 10 Transactions',
-                'description': 'Lists your largest transactions. Helps identify major expenses that significantly impact your budget.'
-            },
-            'daily': {
-                'name': 'Daily Spending Pattern',
-                'description': 'Shows daily spending variations. Useful for understanding daily financial habits and identifying unusual spending days.'
-            }
-        }
-        
-        chart_list = []
+        chart_images = []
         
         try:
-            for chart_key in ['monthly', 'category', 'weekly', 'incomeExpense', 'topTrans', 'daily']:
+            for chart_key in CHART_INFO:
                 if chart_key in charts_data and charts_data[chart_key]:
-                    # Decode base64 image
-                    import base64
-                    chart_bytes = base64.b64decode(charts_data[chart_key].split(',')[-1])
-                    chart_img_buf = io.BytesIO(chart_bytes)
+                    # Decode base64 image (cached across exports)
+                    chart_reader = _decode_chart(charts_data[chart_key])
                     
                     # Create image object (3.2 inches wide for single column)
-                    img = Image(chart_img_buf, width=4.5*inch, height=3*inch)
-                    chart_list.append({
-                        'key': chart_key,
-                        'image': img,
-                        'info': chart_info.get(chart_key, {'name': chart_key, 'description': ''})
-                    })
+                    img = _ChartImage(chart_reader, width=4.5*inch, height=3*inch)
+                    chart_images.append((chart_key, img))
         except Exception as e:
-            elements.append(Paragraph(f"Note: Could not embed charts - {str(e)}", normal_style))
+            elements.append(Paragraph(f"Note: Could not embed charts - {str(e)}", NORMAL_STYLE))
         
         # Add charts in groups of 3 per page
         charts_per_page = 3
-        for page_num in range(0, len(chart_list), charts_per_page):
-            page_charts = chart_list[page_num:page_num + charts_per_page]
-            
-            for chart_data in page_charts:
-                # Add chart title
-                chart_title = ParagraphStyle(
-                    'ChartTitle',
-                    parent=styles['Heading3'],
-                    fontSize=12,
-                    textColor=PRIMARY_COLOR,
-                    spaceAfter=6,
-                    spaceBefore=8,
-                    fontName='Helvetica-Bold'
-                )
-                
-                elements.append(Paragraph(chart_data['info']['name'], chart_title))
-                
-                # Add chart image
-                elements.append(chart_data['image'])
-                
-                # Add description
-                desc_style = ParagraphStyle(
-                    'ChartDesc',
-                    parent=styles['Normal'],
-                    fontSize=9,
-                    textColor=TEXT_COLOR,
-                    spaceAfter=12,
-                    leading=11
-                )
-                elements.append(Paragraph(chart_data['info']['description'], desc_style))
-                elements.append(Spacer(1, 0.15 * inch))
-            
-            # Add page break after each group of 3 charts (except the last one)
-            if page_num + charts_per_page < len(chart_list):
+        for index, (chart_key, img) in enumerate(chart_images):
+            # Page break before each new group of 3 charts
+            if index and index % charts_per_page == 0:
                 elements.append(PageBreak())
+            
+            chart_title, chart_desc = _CHART_PARAGRAPHS[chart_key]
+            elements.append(_static(chart_title))
+            elements.append(img)
+            elements.append(_static(chart_desc))
+            elements.append(Spacer(1, 0.15 * inch))
         
         elements.append(Spacer(1, 0.2 * inch))
     
@@ -288,12 +377,12 @@ def create_styled_pdf(
     # ============================================
     
     if insights:
-        elements.append(Paragraph("Key Insights", heading_style))
+        elements.append(_static(_SECTION_HEADINGS["Key Insights"]))
         
         # Parse insights if it's JSON
         try:
             if isinstance(insights, str):
-                insights_list = json.loads(insights) if insights.startswith('[') else [insights]
+                insights_list = orjson.loads(insights) if insights.startswith('[') else [insights]
             else:
                 insights_list = insights if isinstance(insights, list) else [insights]
         except:
@@ -301,7 +390,7 @@ def create_styled_pdf(
         
         for insight in insights_list[:5]:  # Limit to 5 insights
             insight_text = str(insight) if insight else ""
-            elements.append(Paragraph(f"• {insight_text}", normal_style))
+            elements.append(Paragraph(f"• {insight_text}", NORMAL_STYLE))
             elements.append(Spacer(1, 0.1 * inch))
         
         elements.append(Spacer(1, 0.3 * inch))
@@ -310,16 +399,8 @@ def create_styled_pdf(
     # FOOTER SECTION
     # ============================================
     
-    footer_text = "This report was generated by MindSpend Labs - Personal Behavioral Analyst"
     elements.append(Spacer(1, 0.2 * inch))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        textColor=grey,
-        alignment=TA_CENTER
-    )
-    elements.append(Paragraph(footer_text, footer_style))
+    elements.append(_static(_FOOTER_PARAGRAPH))
     
     # ============================================
     # BUILD PDF
@@ -327,12 +408,20 @@ def create_styled_pdf(
     
     try:
         doc.build(elements)
-        pdf_buffer.seek(0)
-        return pdf_buffer.getvalue()
     except Exception as e:
         raise ValueError(f"PDF generation failed: {str(e)}")
 
 
+def _pdf_response(pdf_buffer: io.BytesIO, filename: str) -> Response:
+    # The PDF is fully built in memory, so it goes out as one body rather
+    # than being re-chunked through a streaming iterator
+    return Response(
+        content=pdf_buffer.getvalue(),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
 # ============================================
 # API ENDPOINTS
 # ============================================
@@ -376,24 +465,20 @@ async def export_analytics_pdf(
                 detail="PDF generation not available. Install reportlab: pip install reportlab"
             )
         
-        # Generate PDF with charts
-        pdf_bytes = create_styled_pdf(
-            filename="analytics.pdf",
+        # Generate PDF with charts (CPU-bound, so off the event loop)
+        pdf_buffer = io.BytesIO()
+        await run_in_threadpool(
+            write_styled_pdf,
+            pdf_buffer,
             title=title,
             summary_data=summary_data,
             charts_data=charts,
             insights=insights
         )
         
-        # Return as streaming response
+        # Return as PDF attachment
         filename = f"MindSpend-Analytics-{datetime.now().strftime('%Y-%m-%d')}.pdf"
-        return StreamingResponse(
-            io.BytesIO(pdf_bytes),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
-        )
+        return _pdf_response(pdf_buffer, filename)
     
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -426,20 +511,16 @@ async def test_export():
             "Transportation costs are up 20% compared to last month"
         ]
         
-        pdf_bytes = create_styled_pdf(
-            filename="test.pdf",
+        pdf_buffer = io.BytesIO()
+        await run_in_threadpool(
+            write_styled_pdf,
+            pdf_buffer,
             title="MindSpend Analytics - Test Report",
             summary_data=sample_data,
-            insights=json.dumps(sample_insights)
+            insights=orjson.dumps(sample_insights).decode()
         )
         
-        return StreamingResponse(
-            io.BytesIO(pdf_bytes),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": "attachment; filename=MindSpend-Test.pdf"
-            }
-        )
+        return _pdf_response(pdf_buffer, "MindSpend-Test.pdf")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -7,13 +7,22 @@ User Data Routes
 - Data export
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-import json
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session, joinedload
+from typing import Iterator, List
+import httpx
+import logging
+import math
+import orjson
+import os
 
-from database import get_db
-from models import User, UserTransaction, UserFinancialMetrics, UserAnalysis
+from database import SessionLocal, get_db
+from models import (
+    User, UserTransaction, UserFinancialMetrics, UserAnalysis,
+    PasswordResetToken, GuestDataMigration
+)
 from auth.schemas import (
     UserResponse, TransactionCreate, TransactionResponse,
     FinancialMetricsUpdate, FinancialMetricsResponse,
@@ -23,19 +32,53 @@ from auth.security import verify_access_token
 
 router = APIRouter(prefix="/user", tags=["user"])
 
+# Child of main.py's "mindspend" logger, so records go through its queue handler
+logger = logging.getLogger("mindspend.user")
+
+# User-editable columns of UserFinancialMetrics (mirrors FinancialMetricsUpdate)
+METRIC_INPUT_FIELDS = tuple(FinancialMetricsUpdate.model_fields)
+
+# Expense columns, in the order they're totalled
+EXPENSE_FIELDS = (
+    "rent", "utilities", "tuition", "loans",
+    "insurance", "subscriptions", "other_expenses"
+)
+# Display names for EXPENSE_FIELDS, index for index
+EXPENSE_LABELS = (
+    "Rent", "Utilities", "Tuition", "Loans",
+    "Insurance", "Subscriptions", "Other"
+)
+
+# Supabase admin credentials, read once (.env is loaded by database.py on import)
+SUPABASE_URL = os.getenv("SUPABASE_URL", "").strip()
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "").strip()
+
+# Shared client so Supabase admin calls reuse pooled connections (and TLS
+# sessions); the service-role auth headers are fixed, so they're set once here.
+# Note: SUPABASE_SERVICE_KEY must be the Service Role Key (not publishable key)
+# Service Role Key can be found in: Supabase Dashboard → Settings → API
+_supabase_http = httpx.Client(
+    headers={
+        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+        "Content-Type": "application/json",
+        "apikey": SUPABASE_SERVICE_KEY
+    },
+    timeout=5
+)
+
+# Tables with a user_id foreign key, cleared when an account is deleted
+USER_OWNED_MODELS = (
+    UserTransaction, UserFinancialMetrics, UserAnalysis,
+    PasswordResetToken, GuestDataMigration
+)
+
 
 # ============================================
 # Authentication Dependency
 # ============================================
 
-def get_current_user(
-    token: str = Depends(verify_access_token),
-    db: Session = Depends(get_db)
-) -> User:
-    """
-    Get current authenticated user from JWT token.
-    Raises 401 if token invalid or user not found.
-    """
+def _load_current_user(token: dict, db: Session, *options) -> User:
+    """Resolve the token's user (with any loader options), or raise 401/404/403."""
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -43,7 +86,7 @@ def get_current_user(
         )
     
     user_id = token.get("user_id")
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.query(User).options(*options).filter(User.id == user_id).first()
     
     if not user:
         raise HTTPException(
@@ -60,6 +103,28 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    token: str = Depends(verify_access_token),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Get current authenticated user from JWT token.
+    Raises 401 if token invalid or user not found.
+    """
+    return _load_current_user(token, db)
+
+
+def get_current_user_with_metrics(
+    token: str = Depends(verify_access_token),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Like get_current_user, but fetches the user's financial metrics in the
+    same query (LEFT JOIN), so metrics endpoints make one round-trip.
+    """
+    return _load_current_user(token, db, joinedload(User.financial_metrics))
+
+
 # ============================================
 # Profile Endpoints
 # ============================================
@@ -71,16 +136,8 @@ def get_profile(current_user: User = Depends(get_current_user)):
     
     Returns user ID, email, username, creation date.
     """
-    return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        username=current_user.username,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        bio=current_user.bio,
-        created_at=current_user.created_at,
-        is_active=current_user.is_active
-    )
+    # UserResponse reads the ORM attributes directly (from_attributes)
+    return current_user
 
 
 @router.put("/profile", response_model=UserResponse)
@@ -107,145 +164,117 @@ def update_profile(
     db.commit()
     db.refresh(current_user)
     
-    return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        username=current_user.username,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        bio=current_user.bio,
-        created_at=current_user.created_at,
-        is_active=current_user.is_active
-    )
+    # UserResponse reads the ORM attributes directly (from_attributes)
+    return current_user
 
 
-@router.delete("/account", response_model=MessageResponse)
-def delete_account(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+def _delete_supabase_user(user_email: str) -> None:
     """
-    Delete user account and all associated data.
+    Delete the matching Supabase auth user (optional - not critical).
     
-    - Marks account as inactive (prevents login)
-    - Deletes all transactions, metrics, analysis data
-    - Cascade deletes handle relationships
-    - Attempts to delete Supabase auth user (requires Service Role Key)
-    - Cannot be undone
+    Runs as a background task after the account deletion response is sent,
+    so Supabase latency never holds up the request.
     """
-    import os
-    from dotenv import load_dotenv
-    import requests
-    
-    user_id = current_user.id
-    user_email = current_user.email
-    
-    print(f"\n🔄 Starting complete account deletion for: {user_email}")
-    
-    try:
-        # Step 1: Delete all related data (transactions, metrics, analysis)
-        print(f"⏳ Deleting user transactions...")
-        db.query(UserTransaction).filter(UserTransaction.user_id == user_id).delete()
-        
-        print(f"⏳ Deleting user financial metrics...")
-        db.query(UserFinancialMetrics).filter(UserFinancialMetrics.user_id == user_id).delete()
-        
-        print(f"⏳ Deleting user analysis data...")
-        db.query(UserAnalysis).filter(UserAnalysis.user_id == user_id).delete()
-        
-        db.commit()
-        print(f"✅ All user data deleted")
-        
-        # Step 2: Delete the user account itself
-        print(f"⏳ Deleting user account from local database...")
-        db.delete(current_user)
-        db.commit()
-        print(f"✅ User account deleted from local database")
-        
-    except Exception as e:
-        db.rollback()
-        print(f"❌ Error during local deletion: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to delete account: {str(e)}"
-        )
-    
-    # Step 3: Attempt Supabase auth user deletion (optional - not critical)
     supabase_status = "⏭️ Skipped"
     try:
-        load_dotenv()
-        supabase_url = os.getenv("SUPABASE_URL", "").strip()
-        supabase_service_key = os.getenv("SUPABASE_SERVICE_KEY", "").strip()
-        
-        if supabase_url and supabase_service_key:
-            print(f"⏳ Attempting Supabase auth deletion...")
-            
-            # Note: SUPABASE_SERVICE_KEY must be the Service Role Key (not publishable key)
-            # Service Role Key can be found in: Supabase Dashboard → Settings → API
-            
-            headers = {
-                "Authorization": f"Bearer {supabase_service_key}",
-                "Content-Type": "application/json",
-                "apikey": supabase_service_key
-            }
+        if SUPABASE_URL and SUPABASE_SERVICE_KEY:
+            logger.info("⏳ Attempting Supabase auth deletion...")
             
-            # Endpoint to list and delete users
-            admin_url = f"{supabase_url}/auth/v1/admin/users"
+            # Admin users endpoint (lookup and delete)
+            admin_url = f"{SUPABASE_URL}/auth/v1/admin/users"
             
             try:
-                # Get users by email
-                response = requests.get(
+                # Ask GoTrue for matching users instead of listing everyone;
+                # its filter is a substring match, so the exact email is
+                # still checked on the (small) result
+                response = _supabase_http.get(
                     admin_url,
-                    headers=headers,
-                    timeout=5
+                    params={"filter": user_email}
                 )
                 
                 if response.status_code == 200:
-                    users = response.json()
-                    # Find user by email
-                    target_user = None
-                    if isinstance(users, list):
-                        target_user = next((u for u in users if u.get("email") == user_email), None)
-                    elif isinstance(users, dict) and "users" in users:
-                        target_user = next((u for u in users["users"] if u.get("email") == user_email), None)
+                    body = response.json()
+                    users = body.get("users", []) if isinstance(body, dict) else body
+                    target_user = next((u for u in users if u.get("email") == user_email), None)
                     
                     if target_user:
                         user_uid = target_user.get("id")
                         # Delete the user
-                        del_response = requests.delete(
-                            f"{admin_url}/{user_uid}",
-                            headers=headers,
-                            timeout=5
-                        )
+                        del_response = _supabase_http.delete(f"{admin_url}/{user_uid}")
                         
                         if del_response.status_code in [200, 204]:
-                            print(f"✅ Deleted Supabase auth user")
+                            logger.info("✅ Deleted Supabase auth user")
                             supabase_status = "✅ Supabase auth user deleted"
                         else:
-                            print(f"⚠️ Supabase deletion status: {del_response.status_code}")
+                            logger.warning(f"⚠️ Supabase deletion status: {del_response.status_code}")
                             supabase_status = f"⚠️ Supabase: {del_response.status_code}"
                     else:
-                        print(f"⚠️ User not found in Supabase")
+                        logger.warning("⚠️ User not found in Supabase")
                         supabase_status = "⚠️ User not found in Supabase"
                 else:
-                    print(f"⚠️ Could not query Supabase users: {response.status_code}")
+                    logger.warning(f"⚠️ Could not query Supabase users: {response.status_code}")
                     supabase_status = f"⚠️ Query failed: {response.status_code}"
                     
-            except requests.exceptions.RequestException as e:
-                print(f"⚠️ Supabase request error: {str(e)}")
+            except httpx.HTTPError as e:
+                logger.warning(f"⚠️ Supabase request error: {str(e)}")
                 supabase_status = f"⚠️ Request error: {str(e)}"
             except Exception as e:
-                print(f"⚠️ Supabase deletion error: {str(e)}")
+                logger.warning(f"⚠️ Supabase deletion error: {str(e)}")
                 supabase_status = f"⚠️ Error: {str(e)}"
         else:
-            print("ℹ️ Supabase credentials not configured")
+            logger.info("ℹ️ Supabase credentials not configured")
             supabase_status = "ℹ️ Credentials not configured"
     except Exception as e:
-        print(f"⚠️ Unexpected error during Supabase operations: {str(e)}")
+        logger.warning(f"⚠️ Unexpected error during Supabase operations: {str(e)}")
         supabase_status = f"⚠️ Unexpected error"
     
-    print(f"📋 Supabase Status: {supabase_status}")
-    print(f"✅ Account deletion completed - user data is permanently removed\n")
+    logger.info(f"📋 Supabase Status: {supabase_status}")
+
+
+@router.delete("/account", response_model=MessageResponse)
+def delete_account(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Delete user account and all associated data.
+    
+    - Marks account as inactive (prevents login)
+    - Deletes all transactions, metrics, analysis data
+    - Cascade deletes handle relationships
+    - Attempts to delete Supabase auth user in the background (requires Service Role Key)
+    - Cannot be undone
+    """
+    user_id = current_user.id
+    user_email = current_user.email
+    
+    logger.info(f"🔄 Starting complete account deletion for: {user_email}")
+    
+    try:
+        # Step 1: Delete all related data and the account itself in a single
+        # transaction (one commit). The foreign keys cascade on new schemas,
+        # but tables created before that, and SQLite (which doesn't enforce
+        # foreign keys by default), need the explicit child deletes.
+        logger.info("⏳ Deleting user data and account from local database...")
+        for model in USER_OWNED_MODELS:
+            db.execute(delete(model).where(model.user_id == user_id))
+        db.execute(delete(User).where(User.id == user_id))
+        db.commit()
+        logger.info("✅ User account and all user data deleted from local database")
+        
+    except Exception as e:
+        db.rollback()
+        logger.error(f"❌ Error during local deletion: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to delete account: {str(e)}"
+        )
+    
+    # Step 2: Supabase auth user deletion runs after the response is sent
+    background_tasks.add_task(_delete_supabase_user, user_email)
+    
+    logger.info("✅ Account deletion completed - user data is permanently removed")
     
     return MessageResponse(
         message="Account and all associated data have been permanently deleted. You have been signed out.",
@@ -259,7 +288,7 @@ def delete_account(
 
 @router.get("/metrics", response_model=FinancialMetricsResponse)
 def get_metrics(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_with_metrics),
     db: Session = Depends(get_db)
 ):
     """
@@ -267,9 +296,7 @@ def get_metrics(
     
     Returns income, expenses, disposable income, savings tips.
     """
-    metrics = db.query(UserFinancialMetrics).filter(
-        UserFinancialMetrics.user_id == current_user.id
-    ).first()
+    metrics = current_user.financial_metrics
     
     if not metrics:
         # Create default metrics if not exist
@@ -291,7 +318,7 @@ def get_metrics(
         other_expenses=metrics.other_expenses,
         total_expenses=metrics.total_expenses,
         disposable_income=metrics.disposable_income,
-        savings_tips=json.loads(metrics.savings_tips) if metrics.savings_tips else [],
+        savings_tips=metrics.savings_tips or [],
         highest_category=metrics.highest_category,
         highest_amount=metrics.highest_amount,
         created_at=metrics.created_at,
@@ -302,7 +329,7 @@ def get_metrics(
 @router.post("/metrics", response_model=FinancialMetricsResponse)
 def update_metrics(
     data: FinancialMetricsUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_with_metrics),
     db: Session = Depends(get_db)
 ):
     """
@@ -312,68 +339,36 @@ def update_metrics(
     - Calculates total expenses and disposable income
     - Generates savings tips based on thresholds
     """
-    metrics = db.query(UserFinancialMetrics).filter(
-        UserFinancialMetrics.user_id == current_user.id
-    ).first()
-    
-    if not metrics:
-        metrics = UserFinancialMetrics(user_id=current_user.id)
-        db.add(metrics)
+    # Read before commit, which expires current_user
+    user_id = current_user.id
+    metrics = current_user.financial_metrics
     
-    # Update fields
-    if data.monthly_income is not None:
-        metrics.monthly_income = data.monthly_income
-    if data.rent is not None:
-        metrics.rent = data.rent
-    if data.utilities is not None:
-        metrics.utilities = data.utilities
-    if data.tuition is not None:
-        metrics.tuition = data.tuition
-    if data.loans is not None:
-        metrics.loans = data.loans
-    if data.insurance is not None:
-        metrics.insurance = data.insurance
-    if data.subscriptions is not None:
-        metrics.subscriptions = data.subscriptions
-    if data.other_expenses is not None:
-        metrics.other_expenses = data.other_expenses
-    
-    # Calculate totals
-    total_expenses = (
-        (metrics.rent or 0) +
-        (metrics.utilities or 0) +
-        (metrics.tuition or 0) +
-        (metrics.loans or 0) +
-        (metrics.insurance or 0) +
-        (metrics.subscriptions or 0) +
-        (metrics.other_expenses or 0)
+    # Merge submitted fields over the stored values (unset -> keep current).
+    # The stored columns are NOT NULL, so only a missing row needs defaults.
+    values = (
+        {field: getattr(metrics, field) for field in METRIC_INPUT_FIELDS}
+        if metrics else dict.fromkeys(METRIC_INPUT_FIELDS, 0.0)
     )
-    metrics.total_expenses = total_expenses
+    values.update(data.model_dump(exclude_none=True))
+    
+    # Calculate totals (fsum: exact, independent of summation order)
+    expenses = tuple(values[field] for field in EXPENSE_FIELDS)
+    total_expenses = math.fsum(expenses)
     
     # Calculate disposable income
-    income = metrics.monthly_income or 0
-    metrics.disposable_income = income - total_expenses
-    
-    # Find highest expense category
-    expense_categories = {
-        "Rent": metrics.rent or 0,
-        "Utilities": metrics.utilities or 0,
-        "Tuition": metrics.tuition or 0,
-        "Loans": metrics.loans or 0,
-        "Insurance": metrics.insurance or 0,
-        "Subscriptions": metrics.subscriptions or 0,
-        "Other": metrics.other_expenses or 0
-    }
-    highest = max(expense_categories.items(), key=lambda x: x[1])
-    metrics.highest_category = highest[0]
-    metrics.highest_amount = highest[1]
+    income = values["monthly_income"]
+    disposable_income = income - total_expenses
+    
+    # Find highest expense category (first one wins on ties)
+    highest_index = max(range(len(expenses)), key=expenses.__getitem__)
+    highest = (EXPENSE_LABELS[highest_index], expenses[highest_index])
     
     # Generate savings tips
     tips = []
     if income > 0:
-        rent_pct = (metrics.rent or 0) / income * 100
-        utilities_pct = (metrics.utilities or 0) / income * 100
-        subscriptions_pct = (metrics.subscriptions or 0) / income * 100
+        rent_pct = values["rent"] / income * 100
+        utilities_pct = values["utilities"] / income * 100
+        subscriptions_pct = values["subscriptions"] / income * 100
         
         if rent_pct > 30:
             tips.append({
@@ -396,42 +391,56 @@ def update_metrics(
                 "severity": "medium"
             })
         
-        if metrics.disposable_income < 0:
+        if disposable_income < 0:
             tips.append({
                 "category": "Budget",
                 "tip": "You're spending more than you earn. Cut expenses immediately.",
                 "severity": "critical"
             })
-        elif metrics.disposable_income < income * 0.1:
+        elif disposable_income < income * 0.1:
             tips.append({
                 "category": "Savings",
                 "tip": "Try to save at least 10-20% of your income.",
                 "severity": "medium"
             })
     
-    metrics.savings_tips = json.dumps(tips)
+    payload = {
+        **values,
+        "total_expenses": total_expenses,
+        "disposable_income": disposable_income,
+        "highest_category": highest[0],
+        "highest_amount": highest[1],
+        "savings_tips": tips,
+    }
     
+    # One statement writes every column; RETURNING hands back the
+    # DB-generated fields so no refresh SELECT is needed
+    if metrics is None:
+        stmt = insert(UserFinancialMetrics).values(user_id=user_id, **payload)
+    else:
+        stmt = (
+            update(UserFinancialMetrics)
+            .where(UserFinancialMetrics.id == metrics.id)
+            .values(**payload)
+        )
+    row = db.execute(stmt.returning(
+        UserFinancialMetrics.id,
+        UserFinancialMetrics.created_at,
+        UserFinancialMetrics.updated_at
+    )).one()
     db.commit()
-    db.refresh(metrics)
     
     return FinancialMetricsResponse(
-        id=metrics.id,
-        user_id=metrics.user_id,
-        monthly_income=metrics.monthly_income,
-        rent=metrics.rent,
-        utilities=metrics.utilities,
-        tuition=metrics.tuition,
-        loans=metrics.loans,
-        insurance=metrics.insurance,
-        subscriptions=metrics.subscriptions,
-        other_expenses=metrics.other_expenses,
-        total_expenses=metrics.total_expenses,
-        disposable_income=metrics.disposable_income,
+        id=row.id,
+        user_id=user_id,
+        **values,
+        total_expenses=total_expenses,
+        disposable_income=disposable_income,
         savings_tips=tips,
-        highest_category=metrics.highest_category,
-        highest_amount=metrics.highest_amount,
-        created_at=metrics.created_at,
-        updated_at=metrics.updated_at
+        highest_category=highest[0],
+        highest_amount=highest[1],
+        created_at=row.created_at,
+        updated_at=row.updated_at
     )
 
 
@@ -439,6 +448,20 @@ def update_metrics(
 # Transaction Endpoints
 # ============================================
 
+# Upper bound on rows accepted by POST /transactions/bulk
+MAX_BULK_TRANSACTIONS = 5000
+
+_TRANSACTION_COLUMNS = select(
+    UserTransaction.id,
+    UserTransaction.user_id,
+    UserTransaction.date,
+    UserTransaction.amount,
+    UserTransaction.category,
+    UserTransaction.description,
+    UserTransaction.created_at,
+)
+
+
 @router.get("/transactions", response_model=List[TransactionResponse])
 def get_transactions(
     current_user: User = Depends(get_current_user),
@@ -452,22 +475,18 @@ def get_transactions(
     - Paginated with limit/offset
     - Ordered by date descending (newest first)
     """
-    transactions = db.query(UserTransaction).filter(
-        UserTransaction.user_id == current_user.id
-    ).order_by(UserTransaction.date.desc()).limit(limit).offset(offset).all()
-    
-    return [
-        TransactionResponse(
-            id=t.id,
-            user_id=t.user_id,
-            date=t.date,
-            amount=t.amount,
-            category=t.category,
-            description=t.description,
-            created_at=t.created_at
-        )
-        for t in transactions
-    ]
+    # Select plain columns instead of ORM entities: no identity-map bookkeeping
+    # per row, and the response is validated once from dicts rather than
+    # building TransactionResponse objects that FastAPI would dump and re-validate
+    rows = db.execute(
+        _TRANSACTION_COLUMNS
+        .where(UserTransaction.user_id == current_user.id)
+        .order_by(UserTransaction.date.desc())
+        .limit(limit)
+        .offset(offset)
+    ).mappings()
+    
+    return [dict(row) for row in rows]
 
 
 @router.post("/transactions", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
@@ -482,76 +501,100 @@ def create_transaction(
     - Date, amount, category required
     - Description optional
     """
-    transaction = UserTransaction(
-        user_id=current_user.id,
-        date=data.date,
-        amount=data.amount,
-        category=data.category,
-        description=data.description
-    )
-    db.add(transaction)
+    # INSERT ... RETURNING hands back id/created_at in the same round-trip
+    row = db.execute(
+        insert(UserTransaction)
+        .values(user_id=current_user.id, **data.model_dump())
+        .returning(*_TRANSACTION_COLUMNS.selected_columns)
+    ).mappings().one()
     db.commit()
-    db.refresh(transaction)
-    
-    return TransactionResponse(
-        id=transaction.id,
-        user_id=transaction.user_id,
-        date=transaction.date,
-        amount=transaction.amount,
-        category=transaction.category,
-        description=transaction.description,
-        created_at=transaction.created_at
-    )
+    
+    return dict(row)
+
+
+@router.post("/transactions/bulk", response_model=List[TransactionResponse], status_code=status.HTTP_201_CREATED)
+def create_transactions_bulk(
+    data: List[TransactionCreate],
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many transactions at once (e.g. a CSV import).
+    
+    - Up to MAX_BULK_TRANSACTIONS per request
+    - All-or-nothing: one statement, one commit
+    """
+    if len(data) > MAX_BULK_TRANSACTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BULK_TRANSACTIONS} transactions per request"
+        )
+    if not data:
+        return []
+    
+    user_id = current_user.id
+    # executemany with RETURNING: SQLAlchemy batches these into multi-row
+    # INSERTs ("insertmanyvalues") rather than one round-trip per row
+    rows = db.execute(
+        insert(UserTransaction).returning(*_TRANSACTION_COLUMNS.selected_columns),
+        [{"user_id": user_id, **item.model_dump()} for item in data]
+    ).mappings().all()
+    db.commit()
+    
+    return [dict(row) for row in rows]
 
 
 # ============================================
 # Data Export Endpoint
 # ============================================
 
-@router.get("/export")
-def export_data(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+# Rows per fetch/encode batch when streaming an export
+EXPORT_BATCH_SIZE = 1000
+
+# Exported transaction fields, in output order
+_EXPORT_TRANSACTION_COLUMNS = select(
+    UserTransaction.date,
+    UserTransaction.amount,
+    UserTransaction.category,
+    UserTransaction.description,
+    UserTransaction.created_at,
+)
+
+
+def _export_chunks(user_id: int, profile: dict) -> Iterator[bytes]:
     """
-    Export all user data (GDPR compliance).
+    Yield the export document as JSON fragments.
     
-    Returns JSON with profile, transactions, metrics, analysis.
+    Transactions are fetched and encoded in batches of EXPORT_BATCH_SIZE, so
+    memory stays flat however long the history is. Uses its own session:
+    the request's session is closed before the body is streamed.
     """
-    # Get transactions
-    transactions = db.query(UserTransaction).filter(
-        UserTransaction.user_id == current_user.id
-    ).all()
-    
-    # Get metrics
-    metrics = db.query(UserFinancialMetrics).filter(
-        UserFinancialMetrics.user_id == current_user.id
-    ).first()
-    
-    # Get analysis
-    analysis = db.query(UserAnalysis).filter(
-        UserAnalysis.user_id == current_user.id
-    ).all()
-    
-    export_data = {
-        "profile": {
-            "id": current_user.id,
-            "email": current_user.email,
-            "username": current_user.username,
-            "created_at": current_user.created_at.isoformat(),
-            "is_active": current_user.is_active
-        },
-        "transactions": [
-            {
-                "date": t.date,
-                "amount": float(t.amount),
-                "category": t.category,
-                "description": t.description,
-                "created_at": t.created_at.isoformat()
-            }
-            for t in transactions
-        ],
-        "financial_metrics": {
+    with SessionLocal() as db:
+        yield b'{"profile":' + orjson.dumps(profile) + b',"transactions":['
+        
+        # Transactions, one encoded batch per chunk
+        rows = db.execute(
+            _EXPORT_TRANSACTION_COLUMNS
+            .where(UserTransaction.user_id == user_id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        ).mappings()
+        separator = b""
+        for batch in rows.partitions():
+            # Encode the batch as one array and drop its brackets
+            yield separator + orjson.dumps([dict(row) for row in batch])[1:-1]
+            separator = b","
+        
+        # Get metrics
+        metrics = db.query(UserFinancialMetrics).filter(
+            UserFinancialMetrics.user_id == user_id
+        ).first()
+        
+        # Get analysis
+        analysis = db.query(UserAnalysis).filter(
+            UserAnalysis.user_id == user_id
+        ).order_by(UserAnalysis.created_at).all()
+        
+        yield b'],"financial_metrics":' + orjson.dumps({
             "monthly_income": float(metrics.monthly_income) if metrics and metrics.monthly_income else 0,
             "rent": float(metrics.rent) if metrics and metrics.rent else 0,
             "utilities": float(metrics.utilities) if metrics and metrics.utilities else 0,
@@ -562,17 +605,39 @@ def export_data(
             "other_expenses": float(metrics.other_expenses) if metrics and metrics.other_expenses else 0,
             "total_expenses": float(metrics.total_expenses) if metrics and metrics.total_expenses else 0,
             "disposable_income": float(metrics.disposable_income) if metrics and metrics.disposable_income else 0,
-            "savings_tips": json.loads(metrics.savings_tips) if metrics and metrics.savings_tips else []
-        } if metrics else {},
-        "analysis": [
+            "savings_tips": metrics.savings_tips or []
+        } if metrics else {})
+        
+        yield b',"analysis":' + orjson.dumps([
             {
                 "type": a.analysis_type,
                 "content": a.content,
-                "metadata": json.loads(a.analysis_metadata) if a.analysis_metadata else {},
-                "created_at": a.created_at.isoformat()
+                "metadata": a.analysis_metadata or {},
+                "created_at": a.created_at
             }
             for a in analysis
-        ]
+        ]) + b"}"
+
+
+@router.get("/export")
+def export_data(
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export all user data (GDPR compliance).
+    
+    Returns JSON with profile, transactions, metrics, analysis, streamed
+    so large transaction histories are never held in memory at once.
+    """
+    profile = {
+        "id": current_user.id,
+        "email": current_user.email,
+        "username": current_user.username,
+        "created_at": current_user.created_at.isoformat(),
+        "is_active": current_user.is_active
     }
     
-    return export_data
+    return StreamingResponse(
+        _export_chunks(current_user.id, profile),
+        media_type="application/json"
+    )
@@ -2,13 +2,17 @@
 """Simple backend server - run this directly"""
 
 from fastapi import FastAPI, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
 from database import SessionLocal, init_db
 from auth.schemas import UserRegister, UserLogin, Token
-from auth.security import hash_password, verify_password, create_access_token, create_refresh_token
+from auth.security import (
+    hash_password_async, verify_password_async, create_access_token, create_refresh_token,
+    DUMMY_PASSWORD_HASH
+)
 
 load_dotenv()
 
@@ -46,8 +50,7 @@ def health():
 def root():
     return {"message": "API running"}
 
-@app.post("/auth/register", response_model=Token, status_code=201)
-def register(user_data: UserRegister, db: Session = Depends(get_db)):
+def _create_account(user_data: UserRegister, password_hash: str, db: Session):
     from models import User, UserFinancialMetrics
     
     # Check if exists
@@ -56,7 +59,7 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
         return {"error": "Email exists"}
     
     # Create user
-    user = User(email=user_data.email, password_hash=hash_password(user_data.password), username=user_data.username)
+    user = User(email=user_data.email, password_hash=password_hash, username=user_data.username)
     db.add(user)
     db.flush()
     
@@ -71,12 +74,23 @@ def register(user_data: UserRegister, db: Session = Depends(get_db)):
     
     return {"access_token": access, "refresh_token": refresh, "token_type": "bearer"}
 
-@app.post("/auth/login", response_model=Token)
-def login(creds: UserLogin, db: Session = Depends(get_db)):
+def _find_user(db: Session, email: str):
     from models import User
-    
-    user = db.query(User).filter(User.email == creds.email).first()
-    if not user or not verify_password(creds.password, user.password_hash):
+    return db.query(User).filter(User.email == email).first()
+
+# bcrypt runs on its own pool; blocking DB work stays on the threadpool
+@app.post("/auth/register", response_model=Token, status_code=201)
+async def register(user_data: UserRegister, db: Session = Depends(get_db)):
+    password_hash = await hash_password_async(user_data.password)
+    return await run_in_threadpool(_create_account, user_data, password_hash, db)
+
+@app.post("/auth/login", response_model=Token)
+async def login(creds: UserLogin, db: Session = Depends(get_db)):
+    user = await run_in_threadpool(_find_user, db, creds.email)
+    if not user:
+        await verify_password_async(creds.password, DUMMY_PASSWORD_HASH)  # same cost as a real check
+        return {"error": "Invalid"}
+    if not await verify_password_async(creds.password, user.password_hash):
         return {"error": "Invalid"}
     
     access = create_access_token({"sub": user.email, "user_id": user.id})
@@ -11,31 +11,52 @@ import json
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 try:
+    from reportlab import rl_config
+    rl_config.shapeChecking = 0  # skip per-attribute validation of flowables
     from reportlab.lib.pagesizes import letter, A4
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import inch
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
     from reportlab.lib.colors import HexColor, grey
     from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-    import io
     
     print("✅ ReportLab imported successfully")
 except ImportError as e:
     print(f"❌ ReportLab import failed: {e}")
     sys.exit(1)
 
+# Color scheme
+PRIMARY_COLOR = HexColor("#6b9080")
+DARK_COLOR = HexColor("#4d7464")
+TEXT_COLOR = HexColor("#636e72")
+BORDER_COLOR = HexColor("#e0ddd5")
+LIGHT_BG = HexColor("#f9f8f6")
+
+# Styles are built once at import; getSampleStyleSheet() is costly to rebuild
+styles = getSampleStyleSheet()
+title_style = ParagraphStyle(
+    'CustomTitle',
+    parent=styles['Heading1'],
+    fontSize=24,
+    textColor=DARK_COLOR,
+    spaceAfter=12,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+heading_style = ParagraphStyle(
+    'CustomHeading',
+    parent=styles['Heading2'],
+    fontSize=14,
+    textColor=PRIMARY_COLOR,
+    spaceAfter=12,
+    fontName='Helvetica-Bold'
+)
+
 def create_simple_pdf():
     """Create a simple test PDF"""
     
     print("🧪 Testing PDF Generation...")
     
-    # Color scheme
-    PRIMARY_COLOR = HexColor("#6b9080")
-    DARK_COLOR = HexColor("#4d7464")
-    TEXT_COLOR = HexColor("#636e72")
-    BORDER_COLOR = HexColor("#e0ddd5")
-    LIGHT_BG = HexColor("#f9f8f6")
-    
     # Sample data
     summary_data = {
         "total_income": 50000,
@@ -46,10 +67,10 @@ def create_simple_pdf():
     }
     
     try:
-        # Create PDF in memory
-        pdf_buffer = io.BytesIO()
+        # Write the PDF straight to the output file (no in-memory copy)
+        output_path = "test_output.pdf"
         doc = SimpleDocTemplate(
-            pdf_buffer,
+            output_path,
             pagesize=A4,
             rightMargin=0.75 * inch,
             leftMargin=0.75 * inch,
@@ -58,33 +79,12 @@ def create_simple_pdf():
         )
         
         elements = []
-        styles = getSampleStyleSheet()
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=DARK_COLOR,
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
         elements.append(Paragraph("MindSpend Analytics Report", title_style))
         elements.append(Spacer(1, 0.3 * inch))
         
         # Summary table
-        normal_style = styles['Normal']
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            textColor=PRIMARY_COLOR,
-            spaceAfter=12,
-            fontName='Helvetica-Bold'
-        )
-        
         elements.append(Paragraph("Summary Statistics", heading_style))
         
         summary_rows = [['Metric', 'Value']]
@@ -114,14 +114,8 @@ def create_simple_pdf():
         
         # Build PDF
         doc.build(elements)
-        pdf_buffer.seek(0)
-        
-        # Save to file
-        output_path = "test_output.pdf"
-        with open(output_path, 'wb') as f:
-            f.write(pdf_buffer.getvalue())
         
-        file_size = len(pdf_buffer.getvalue())
+        file_size = os.path.getsize(output_path)
         print(f"✅ PDF generated successfully!")
         print(f"   File size: {file_size} bytes")
         print(f"   Saved to: {output_path}")
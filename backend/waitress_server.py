@@ -1,33 +1,132 @@
 """
 Production-grade Flask server using Waitress (works well on Windows)
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request
 from flask_cors import CORS
-import jwt
 import bcrypt
+import orjson
 import sqlite3
+import base64
+import binascii
+import hashlib
+import hmac
 import os
-from datetime import datetime, timedelta
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type, datetime
 from functools import wraps
+from typing import Annotated, List, Optional
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 # Configuration
 SECRET_KEY = os.getenv('JWT_SECRET', 'your-secret-key-change-in-production')
+TOKEN_LIFETIME_SECONDS = 24 * 60 * 60
 DATABASE = 'mindspend.db'
+# Bump when init_database gains new DDL; stored in SQLite's user_version
+SCHEMA_VERSION = 1
+
+# bcrypt work factor; existing hashes keep their own cost
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+# Hashing runs on a pool sized to the cores, so a burst of logins can't
+# occupy every Waitress thread (and extra concurrency would only queue)
+_bcrypt_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='bcrypt')
+
+# Decoded payloads of recently verified tokens, keyed by a digest of the token
+TOKEN_CACHE_SIZE = 4096
+_token_cache = OrderedDict()
+# Waitress serves requests from several threads
+_token_cache_lock = threading.Lock()
+
+# Upper bound on rows accepted by POST /user/transactions/bulk
+MAX_BULK_TRANSACTIONS = 5000
+
+# Request bodies: validated straight from the raw JSON bytes by pydantic's
+# compiled validators (one pass, no json.loads + .get() checks)
+NonEmptyStr = Annotated[str, Field(min_length=1)]
+
+class RegisterRequest(BaseModel):
+    email: NonEmptyStr
+    password: NonEmptyStr
+    username: Optional[str] = ''
+
+class LoginRequest(BaseModel):
+    email: NonEmptyStr
+    password: NonEmptyStr
+
+class UpdateProfileRequest(BaseModel):
+    username: NonEmptyStr
+
+class ChangePasswordRequest(BaseModel):
+    current_password: NonEmptyStr
+    new_password: NonEmptyStr
+
+class MetricsRequest(BaseModel):
+    monthly_income: Optional[float] = None
+    rent_mortgage: Optional[float] = None
+    utilities: Optional[float] = None
+    groceries: Optional[float] = None
+    transportation: Optional[float] = None
+    healthcare: Optional[float] = None
+    entertainment: Optional[float] = None
+    other_expenses: Optional[float] = None
+    savings_goal: Optional[float] = None
+
+class TransactionRow(BaseModel):
+    date: date_type
+    amount: float = Field(allow_inf_nan=False)
+    category: Optional[str] = None
+    description: Optional[str] = None
+
+BulkTransactionsRequest = TypeAdapter(
+    Annotated[List[TransactionRow], Field(max_length=MAX_BULK_TRANSACTIONS)]
+)
+
+def parse_body(validate_json):
+    """Run a pydantic validate_json over the request body; None if it doesn't fit"""
+    try:
+        return validate_json(request.get_data())
+    except ValidationError:
+        return None
+
+# One connection per Waitress thread, kept open for the life of the thread
+_local = threading.local()
 
 def get_db():
-    """Get database connection"""
-    conn = sqlite3.connect(DATABASE, timeout=30, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    conn.execute('PRAGMA journal_mode=WAL')  # Write-Ahead Logging for better concurrency
+    """Get this thread's database connection (opened on first use)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        # Autocommit: reads and single-statement writes run without BEGIN/COMMIT;
+        # multi-statement writes open their own transaction with BEGIN
+        conn = sqlite3.connect(DATABASE, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')  # Write-Ahead Logging for better concurrency
+        # Under WAL, NORMAL only syncs at checkpoints: commits survive an app
+        # crash and can only be lost on power failure
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA wal_autocheckpoint=1000')
+        conn.execute('PRAGMA cache_size=-64000')  # 64MB page cache per connection
+        conn.execute('PRAGMA temp_store=MEMORY')
+        _local.conn = conn
     return conn
 
+@app.teardown_appcontext
+def release_db(exc):
+    """Roll back anything a failed request left uncommitted; the connection stays open"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
 def init_database():
     """Initialize the database with required tables"""
     conn = get_db()
     cursor = conn.cursor()
+    cursor.execute('BEGIN')
     
     # Users table
     cursor.execute('''
@@ -72,35 +171,112 @@ def init_database():
         )
     ''')
     
+    # Indexes for the per-user lookups (users.email is indexed by its UNIQUE constraint)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ut_user_id_date ON user_transactions (user_id, date)
+    ''')
+    # One metrics row per user; older databases may hold duplicates from
+    # concurrent first saves, so keep only the newest before enforcing it
+    cursor.execute('''
+        DELETE FROM user_financial_metrics
+        WHERE id NOT IN (SELECT MAX(id) FROM user_financial_metrics GROUP BY user_id)
+    ''')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_ufm_user_id ON user_financial_metrics (user_id)
+    ''')
+    
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
-    conn.close()
+
+def schema_is_current():
+    """True if the database already has this version's schema (a single header read, no locks)"""
+    return get_db().execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION
 
 def hash_password(password):
     """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return _bcrypt_pool.submit(bcrypt.hashpw, password.encode('utf-8'), salt).result().decode('utf-8')
 
 def verify_password(password, password_hash):
     """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    return _bcrypt_pool.submit(
+        bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8')
+    ).result()
+
+# Checked against when a login email doesn't exist (see login)
+DUMMY_PASSWORD_HASH = hash_password(os.urandom(16).hex())
+
+# Every token is HS256, so the JWT header segment is a constant
+# (byte-for-byte what PyJWT emitted, so earlier tokens still verify)
+_JWT_HEADER = b'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9'
+_JWT_KEY = SECRET_KEY.encode('utf-8')
+
+def _b64url_encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
 
-def create_token(user_id, email):
+def _b64url_decode(segment):
+    return base64.urlsafe_b64decode(segment + b'=' * (-len(segment) % 4))
+
+def _sign_hs256(signing_input):
+    return _b64url_encode(hmac.new(_JWT_KEY, signing_input, hashlib.sha256).digest())
+
+def create_token(user_id):
     """Create a JWT token"""
     payload = {
         'user_id': user_id,
-        'email': email,
-        'exp': datetime.utcnow() + timedelta(hours=24)
+        'exp': int(time.time()) + TOKEN_LIFETIME_SECONDS
     }
-    return jwt.encode(payload, SECRET_KEY, algorithm='HS256')
+    signing_input = _JWT_HEADER + b'.' + _b64url_encode(orjson.dumps(payload))
+    return (signing_input + b'.' + _sign_hs256(signing_input)).decode('ascii')
 
-def verify_token(token):
-    """Verify and decode a JWT token"""
+def _decode_token(token):
+    """Check an HS256 token's signature and expiry; returns its payload or None"""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return payload
-    except jwt.ExpiredSignatureError:
+        signing_input, _, signature = token.encode('ascii').rpartition(b'.')
+        header, _, body = signing_input.partition(b'.')
+        if header != _JWT_HEADER or not hmac.compare_digest(signature, _sign_hs256(signing_input)):
+            return None
+        payload = orjson.loads(_b64url_decode(body))
+    except (UnicodeEncodeError, binascii.Error, orjson.JSONDecodeError):
+        return None
+    if not isinstance(payload, dict) or not isinstance(payload.get('exp'), (int, float)):
         return None
-    except jwt.InvalidTokenError:
+    if payload['exp'] <= time.time():
+        return None
+    return payload
+
+def verify_token(token):
+    """Verify and decode a JWT token"""
+    # Tokens are reused for hours, so skip the HMAC/decode for ones already
+    # verified; the cached payload is only served until its own expiry
+    key = hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+    with _token_cache_lock:
+        payload = _token_cache.get(key)
+        if payload is not None:
+            if payload['exp'] > time.time():
+                _token_cache.move_to_end(key)
+                return payload
+            del _token_cache[key]
+    
+    payload = _decode_token(token)
+    if payload is None:
         return None
+    
+    with _token_cache_lock:
+        _token_cache[key] = payload
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
+
+def ojsonify(data):
+    """JSON response serialized with orjson (bytes out, no stdlib json pass)"""
+    return Response(orjson.dumps(data), mimetype='application/json')
+
+def ojsonify_cached(data):
+    """Like ojsonify, but tagged with a content ETag; a matching If-None-Match gets an empty 304"""
+    response = ojsonify(data)
+    response.set_etag(hashlib.blake2b(response.get_data(), digest_size=8).hexdigest())
+    return response.make_conditional(request)
 
 def require_auth(f):
     """Decorator to require authentication"""
@@ -108,15 +284,14 @@ def require_auth(f):
     def decorated_function(*args, **kwargs):
         auth_header = request.headers.get('Authorization')
         if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({'error': 'Missing or invalid authorization header'}), 401
+            return ojsonify({'error': 'Missing or invalid authorization header'}), 401
         
-        token = auth_header.split(' ')[1]
+        token = auth_header[7:]  # after 'Bearer '
         payload = verify_token(token)
         if not payload:
-            return jsonify({'error': 'Invalid or expired token'}), 401
+            return ojsonify({'error': 'Invalid or expired token'}), 401
         
         request.user_id = payload['user_id']
-        request.user_email = payload['email']
         return f(*args, **kwargs)
     
     return decorated_function
@@ -125,12 +300,12 @@ def require_auth(f):
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
+    return ojsonify({'status': 'healthy', 'timestamp': datetime.utcnow()})
 
 @app.route('/', methods=['GET'])
 def root():
     """Root endpoint"""
-    return jsonify({
+    return ojsonify({
         'name': 'MindSpend API',
         'version': '1.0.0',
         'status': 'running'
@@ -140,13 +315,10 @@ def root():
 def register():
     """Register a new user"""
     try:
-        data = request.get_json()
-        email = data.get('email')
-        password = data.get('password')
-        username = data.get('username', '')
-        
-        if not email or not password:
-            return jsonify({'error': 'Email and password are required'}), 400
+        data = parse_body(RegisterRequest.model_validate_json)
+        if data is None:
+            return ojsonify({'error': 'Email and password are required'}), 400
+        email, password, username = data.email, data.password, data.username
         
         conn = get_db()
         cursor = conn.cursor()
@@ -154,8 +326,7 @@ def register():
         # Check if user exists
         cursor.execute('SELECT id FROM users WHERE email = ?', (email,))
         if cursor.fetchone():
-            conn.close()
-            return jsonify({'error': 'Email already registered'}), 409
+            return ojsonify({'error': 'Email already registered'}), 409
         
         # Create user
         password_hash = hash_password(password)
@@ -163,14 +334,12 @@ def register():
             'INSERT INTO users (email, password_hash, username) VALUES (?, ?, ?)',
             (email, password_hash, username)
         )
-        conn.commit()
         user_id = cursor.lastrowid
-        conn.close()
         
         # Create token
-        token = create_token(user_id, email)
+        token = create_token(user_id)
         
-        return jsonify({
+        return ojsonify({
             'access_token': token,
             'refresh_token': token,
             'token_type': 'bearer',
@@ -180,32 +349,35 @@ def register():
         }), 201
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/auth/login', methods=['POST'])
 def login():
     """Login user"""
     try:
-        data = request.get_json()
-        email = data.get('email')
-        password = data.get('password')
-        
-        if not email or not password:
-            return jsonify({'error': 'Email and password are required'}), 400
+        data = parse_body(LoginRequest.model_validate_json)
+        if data is None:
+            return ojsonify({'error': 'Email and password are required'}), 400
+        email, password = data.email, data.password
         
         conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('SELECT id, email, password_hash, username FROM users WHERE email = ?', (email,))
         user = cursor.fetchone()
-        conn.close()
         
-        if not user or not verify_password(password, user['password_hash']):
-            return jsonify({'error': 'Invalid email or password'}), 401
+        if not user:
+            # Spend the same bcrypt time as a real check, so unknown emails
+            # can't be told apart (or probed for free)
+            verify_password(password, DUMMY_PASSWORD_HASH)
+            return ojsonify({'error': 'Invalid email or password'}), 401
+        
+        if not verify_password(password, user['password_hash']):
+            return ojsonify({'error': 'Invalid email or password'}), 401
         
-        token = create_token(user['id'], user['email'])
+        token = create_token(user['id'])
         
-        return jsonify({
+        return ojsonify({
             'access_token': token,
             'refresh_token': token,
             'token_type': 'bearer',
@@ -215,14 +387,14 @@ def login():
         })
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/auth/refresh', methods=['POST'])
 @require_auth
 def refresh():
     """Refresh authentication token"""
-    token = create_token(request.user_id, request.user_email)
-    return jsonify({
+    token = create_token(request.user_id)
+    return ojsonify({
         'access_token': token,
         'refresh_token': token,
         'token_type': 'bearer'
@@ -238,30 +410,28 @@ def get_profile():
         
         cursor.execute('SELECT id, email, username FROM users WHERE id = ?', (request.user_id,))
         user = cursor.fetchone()
-        conn.close()
         
         if not user:
-            return jsonify({'error': 'User not found'}), 404
+            return ojsonify({'error': 'User not found'}), 404
         
-        return jsonify({
+        return ojsonify_cached({
             'id': user['id'],
             'email': user['email'],
             'username': user['username']
         })
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/user/profile', methods=['PUT'])
 @require_auth
 def update_profile():
     """Update user profile"""
     try:
-        data = request.get_json()
-        username = data.get('username')
-        
-        if not username:
-            return jsonify({'error': 'Username is required'}), 400
+        data = parse_body(UpdateProfileRequest.model_validate_json)
+        if data is None:
+            return ojsonify({'error': 'Username is required'}), 400
+        username = data.username
         
         conn = get_db()
         cursor = conn.cursor()
@@ -270,32 +440,28 @@ def update_profile():
             'UPDATE users SET username = ? WHERE id = ?',
             (username, request.user_id)
         )
-        conn.commit()
         
         cursor.execute('SELECT id, email, username FROM users WHERE id = ?', (request.user_id,))
         user = cursor.fetchone()
-        conn.close()
         
-        return jsonify({
+        return ojsonify({
             'id': user['id'],
             'email': user['email'],
             'username': user['username']
         })
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/auth/change-password', methods=['POST'])
 @require_auth
 def change_password():
     """Change user password"""
     try:
-        data = request.get_json()
-        current_password = data.get('current_password')
-        new_password = data.get('new_password')
-        
-        if not current_password or not new_password:
-            return jsonify({'error': 'Current and new passwords are required'}), 400
+        data = parse_body(ChangePasswordRequest.model_validate_json)
+        if data is None:
+            return ojsonify({'error': 'Current and new passwords are required'}), 400
+        current_password, new_password = data.current_password, data.new_password
         
         conn = get_db()
         cursor = conn.cursor()
@@ -305,13 +471,11 @@ def change_password():
         user = cursor.fetchone()
         
         if not user:
-            conn.close()
-            return jsonify({'error': 'User not found'}), 404
+            return ojsonify({'error': 'User not found'}), 404
         
         # Verify current password
         if not verify_password(current_password, user['password_hash']):
-            conn.close()
-            return jsonify({'error': 'Current password is incorrect'}), 401
+            return ojsonify({'error': 'Current password is incorrect'}), 401
         
         # Update password
         new_password_hash = hash_password(new_password)
@@ -319,13 +483,11 @@ def change_password():
             'UPDATE users SET password_hash = ? WHERE id = ?',
             (new_password_hash, request.user_id)
         )
-        conn.commit()
-        conn.close()
         
-        return jsonify({'message': 'Password updated successfully'})
+        return ojsonify({'message': 'Password updated successfully'})
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/user/metrics', methods=['GET'])
 @require_auth
@@ -334,68 +496,86 @@ def get_metrics():
     try:
         conn = get_db()
         cursor = conn.cursor()
+        # Plain tuples: the row is zipped straight into a dict below
+        cursor.row_factory = None
         
         cursor.execute('SELECT * FROM user_financial_metrics WHERE user_id = ?', (request.user_id,))
         metrics = cursor.fetchone()
-        conn.close()
         
         if not metrics:
-            return jsonify({'message': 'No metrics found'}), 404
+            return ojsonify({'message': 'No metrics found'}), 404
         
-        return jsonify(dict(metrics))
+        columns = [column[0] for column in cursor.description]
+        return ojsonify_cached(dict(zip(columns, metrics)))
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 @app.route('/user/metrics', methods=['POST'])
 @require_auth
 def update_metrics():
     """Update user financial metrics"""
     try:
-        data = request.get_json()
+        data = parse_body(MetricsRequest.model_validate_json)
+        if data is None:
+            return ojsonify({'error': 'Metric values must be numbers'}), 400
         
         conn = get_db()
         cursor = conn.cursor()
         
-        # Check if metrics exist
-        cursor.execute('SELECT id FROM user_financial_metrics WHERE user_id = ?', (request.user_id,))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing
-            cursor.execute('''
-                UPDATE user_financial_metrics 
-                SET monthly_income = ?, rent_mortgage = ?, utilities = ?, groceries = ?,
-                    transportation = ?, healthcare = ?, entertainment = ?, other_expenses = ?,
-                    savings_goal = ?
-                WHERE user_id = ?
-            ''', (
-                data.get('monthly_income'), data.get('rent_mortgage'), data.get('utilities'),
-                data.get('groceries'), data.get('transportation'), data.get('healthcare'),
-                data.get('entertainment'), data.get('other_expenses'), data.get('savings_goal'),
-                request.user_id
-            ))
-        else:
-            # Insert new
-            cursor.execute('''
-                INSERT INTO user_financial_metrics 
-                (user_id, monthly_income, rent_mortgage, utilities, groceries, transportation,
-                 healthcare, entertainment, other_expenses, savings_goal)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                request.user_id, data.get('monthly_income'), data.get('rent_mortgage'),
-                data.get('utilities'), data.get('groceries'), data.get('transportation'),
-                data.get('healthcare'), data.get('entertainment'), data.get('other_expenses'),
-                data.get('savings_goal')
-            ))
-        
-        conn.commit()
-        conn.close()
-        
-        return jsonify({'message': 'Metrics updated successfully'})
+        # Insert or overwrite the user's row in one statement (unique on user_id)
+        cursor.execute('''
+            INSERT INTO user_financial_metrics 
+            (user_id, monthly_income, rent_mortgage, utilities, groceries, transportation,
+             healthcare, entertainment, other_expenses, savings_goal)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                monthly_income = excluded.monthly_income, rent_mortgage = excluded.rent_mortgage,
+                utilities = excluded.utilities, groceries = excluded.groceries,
+                transportation = excluded.transportation, healthcare = excluded.healthcare,
+                entertainment = excluded.entertainment, other_expenses = excluded.other_expenses,
+                savings_goal = excluded.savings_goal
+        ''', (
+            request.user_id, data.monthly_income, data.rent_mortgage,
+            data.utilities, data.groceries, data.transportation,
+            data.healthcare, data.entertainment, data.other_expenses,
+            data.savings_goal
+        ))
+        
+        return ojsonify({'message': 'Metrics updated successfully'})
+    
+    except Exception as e:
+        return ojsonify({'error': str(e)}), 500
+
+def bulk_insert_transactions(user_id, rows):
+    """Insert many TransactionRows for a user in one transaction; returns the row count"""
+    conn = get_db()
+    # One prepared statement reused for every row, one commit (rolled back on error)
+    conn.execute('BEGIN')
+    with conn:
+        cursor = conn.executemany(
+            'INSERT INTO user_transactions (user_id, date, amount, category, description) VALUES (?, ?, ?, ?, ?)',
+            ((user_id, row.date.isoformat(), row.amount, row.category, row.description) for row in rows)
+        )
+    return cursor.rowcount
+
+@app.route('/user/transactions/bulk', methods=['POST'])
+@require_auth
+def create_transactions_bulk():
+    """Add many transactions at once"""
+    try:
+        rows = parse_body(BulkTransactionsRequest.validate_json)
+        if rows is None:
+            return ojsonify({
+                'error': f'Expected a list of at most {MAX_BULK_TRANSACTIONS} transactions, each with a YYYY-MM-DD date and a finite amount'
+            }), 400
+        
+        inserted = bulk_insert_transactions(request.user_id, rows)
+        
+        return ojsonify({'message': 'Transactions added successfully', 'count': inserted}), 201
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
     print("=" * 60)
@@ -403,13 +583,22 @@ if __name__ == '__main__':
     print("=" * 60)
     print("\n📊 Initializing database...")
     
+    # `python waitress_server.py migrate` applies the schema and exits; a
+    # normal start only runs the DDL when the database is behind
+    migrate_only = sys.argv[1:] == ['migrate']
     try:
-        init_database()
-        print("✅ Database initialized successfully")
+        if migrate_only or not schema_is_current():
+            init_database()
+            print("✅ Database initialized successfully")
+        else:
+            print("✅ Database schema is up to date")
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
         exit(1)
     
+    if migrate_only:
+        exit(0)
+    
     print("\n🌐 Starting Waitress WSGI server...")
     print("📍 Server will be available at: http://127.0.0.1:8001")
     print("🔧 Using Waitress (production-grade server for Windows)")
@@ -418,4 +607,8 @@ if __name__ == '__main__':
     print("\n💡 Press CTRL+C to stop the server\n")
     
     from waitress import serve
-    serve(app, host='127.0.0.1', port=8001, threads=4)
+    # bcrypt runs on its own pool, so request threads mostly wait on I/O and
+    # can outnumber the cores; override with WAITRESS_THREADS
+    threads = int(os.getenv('WAITRESS_THREADS', max(8, 2 * (os.cpu_count() or 1))))
+    serve(app, host='127.0.0.1', port=8001, threads=threads,
+          connection_limit=1000, channel_timeout=30)